@@ -1,62 +1,153 @@
 # This is a python comment.
 
-from typing import Iterator
-from agno.agent import Agent, RunResponse
+import os
+import threading
 from textwrap import dedent
 
-from agno.models.ollama import Ollama
-from agno.models.google import Gemini
-from agno.models.groq import Groq
-
-from agno.tools.googlesearch import GoogleSearchTools
-from agno.tools.reasoning import ReasoningTools
-from agno.tools.arxiv import ArxivTools
-from agno.tools.newspaper4k import Newspaper4kTools
-from agno.tools.cartesia import CartesiaTools
-from agno.utils.audio import write_audio_to_file
+from agno.agent import Agent
+from agno.team import Team
 
-from agno.memory.v2.memory import Memory
-from agno.storage.sqlite import SqliteStorage
+import tool_cache
+import tracing
+from registry import Registry
+from model_pool import ModelPool, PooledModel
 
-from agno.team import Team
+# Models, toolkits and storage are built on first use through the registry below: a provider SDK or a
+# tool's dependencies (arxiv, newspaper4k, googlesearch, cartesia) are only imported once an agent
+# that needs them is created or a model call goes to that provider.
 
-ollama_model = Ollama(
-    id = "qwen3:1.7b",
-    options = {
-        "temperature": 0.7,
-        "top_p": 0.9
-    },
-)
+def build_ollama_model():
+    from agno.models.ollama import Ollama
 
-gemini_model = Gemini(
-    id="gemini-2.0-flash-lite",
-    temperature=0.7,
-    top_k=70
-)
+    return Ollama(
+        id = "qwen3:1.7b",
+        options = {
+            "temperature": 0.7,
+            "top_p": 0.9
+        },
+    )
 
-groq_model = Groq(
-    id = "meta-llama/llama-4-scout-17b-16-16e-instruct",
-    temperature = 0.7,
-    top_p=0.9
-)
+def build_gemini_model():
+    from agno.models.google import Gemini
 
-content_strategist_model = gemini_model
-content_writer_model = gemini_model
-content_caption_writer_model = gemini_model
-voice_agent_model = gemini_model
+    return Gemini(
+        id="gemini-2.0-flash-lite",
+        temperature=0.7,
+        top_k=70
+    )
 
-summary_agent = gemini_model
+def build_groq_model():
+    from agno.models.groq import Groq
 
-debug_mode = True
+    return Groq(
+        id = "meta-llama/llama-4-scout-17b-16e-instruct",
+        temperature = 0.7,
+        top_p=0.9
+    )
 
 storage_db_file = "temp/shared_storage.db"
-shared_storage = SqliteStorage(table_name="shared_storage", db_file=storage_db_file)
+storage_table_name = "shared_storage"
+
+def build_shared_storage():
+    # Pooled WAL-mode engine with indexes, see storage.py
+    import storage
+
+    return storage.create_storage(storage_table_name, storage_db_file)
+
+def build_team_memory():
+    from agno.memory.v2.memory import Memory
+
+    return Memory(db=registry.get("shared_storage"))
+
+# Toolkits hold no per-session state, so one instance of each is shared by every agent and team
+# instead of being rebuilt (and re-creating their HTTP clients) on every Streamlit rerun.
+# Tool calls are traced outside the cache, so cache hits show up in the timings too.
+def build_strategist_search_tools():
+    from agno.tools.googlesearch import GoogleSearchTools
+
+    return tracing.trace_toolkit(tool_cache.cache_toolkit(
+        GoogleSearchTools(fixed_max_results=5, fixed_language="en"), namespace="top5"
+    ))
+
+def build_writer_search_tools():
+    from agno.tools.googlesearch import GoogleSearchTools
+
+    return tracing.trace_toolkit(tool_cache.cache_toolkit(GoogleSearchTools(fixed_language='en')))
+
+def build_reasoning_tools():
+    from agno.tools.reasoning import ReasoningTools
+
+    return tracing.trace_toolkit(ReasoningTools(add_instructions = True))
+
+def build_arxiv_tools():
+    from agno.tools.arxiv import ArxivTools
 
-team_memory = Memory(db=shared_storage)
+    return tracing.trace_toolkit(tool_cache.cache_toolkit(ArxivTools()))
+
+def build_newspaper_tools():
+    from agno.tools.newspaper4k import Newspaper4kTools
+
+    return tracing.trace_toolkit(tool_cache.cache_toolkit(Newspaper4kTools()))
+
+def build_podcast_audio_tools():
+    from tts_pipeline import PodcastAudioTools
+
+    return tracing.trace_toolkit(PodcastAudioTools())
+
+registry = Registry({
+    "ollama": build_ollama_model,
+    "gemini": build_gemini_model,
+    "groq": build_groq_model,
+    "shared_storage": build_shared_storage,
+    "team_memory": build_team_memory,
+    "strategist_search_tools": build_strategist_search_tools,
+    "writer_search_tools": build_writer_search_tools,
+    "reasoning_tools": build_reasoning_tools,
+    "arxiv_tools": build_arxiv_tools,
+    "newspaper_tools": build_newspaper_tools,
+    "podcast_audio_tools": build_podcast_audio_tools,
+})
+
+# Every role goes through a model pool: Gemini first, Groq when Gemini is slow or failing. The small
+# local model is not ranked with them, since the pool ranks by latency alone and it would win roles
+# such as the script writer; set PODCAST_HEDGE_SECONDS to fire a backup request at it after that deadline.
+# Pools only hold a view of the registry, so a provider is built the first time a call is sent to it.
+hedge_after = float(os.getenv("PODCAST_HEDGE_SECONDS")) if os.getenv("PODCAST_HEDGE_SECONDS") else None
+
+def get_model_pool(role: str) -> PooledModel:
+    providers = ["gemini", "groq"] + (["ollama"] if hedge_after is not None else [])
+    return PooledModel(pool=ModelPool(
+        role,
+        registry.view(providers),
+        hedge_with="ollama" if hedge_after is not None else None,
+        hedge_after=hedge_after,
+    ))
+
+team_model = get_model_pool("team")
+content_strategist_model = get_model_pool("content_strategist")
+content_writer_model = get_model_pool("content_writer")
+content_caption_writer_model = get_model_pool("content_caption_writer")
+voice_agent_model = get_model_pool("voice_agent")
+
+# Summaries are cheap, so they are pinned to the local model (Gemini only if Ollama is down).
+summary_agent = PooledModel(pool=ModelPool("summary", registry.view(["ollama", "gemini"]), pinned="ollama"))
+
+# Verbose agno logs; per-stage timings are recorded by tracing.py regardless.
+debug_mode = os.getenv("PODCAST_DEBUG", "0") == "1"
+
+# Agents are not safe to run from several threads at once, so the summary agent is cached per thread.
+_summary_agents = threading.local()
 
 def get_summary_agent(session_id: str):
+    # The summary agent keeps no history, so one instance per thread serves every session.
+    agent = getattr(_summary_agents, "agent", None)
+    if agent is None:
+        agent = _summary_agents.agent = build_summary_agent()
+    return agent
+
+def build_summary_agent():
     return Agent(
-        model=gemini_model,
+        model=summary_agent,
         instructions=dedent("""\
             Your job is to summarize given text in 5 words or less.
             The format of the response should not contain anything but the summary.
@@ -73,14 +164,12 @@ def get_content_strategist_agent(session_id: str):
         """),
         model = content_strategist_model,
         tools = [
-            GoogleSearchTools(fixed_max_results=5, fixed_language="en"),
-            ReasoningTools(
-                add_instructions = True,
-            ),
+            registry.get("strategist_search_tools"),
+            registry.get("reasoning_tools"),
         ],
-        storage=shared_storage,
-        add_history_to_messages=True,
-        memory=team_memory,
+        storage=registry.get("shared_storage"),
+        add_history_to_messages=False,
+        memory=registry.get("team_memory"),
 
         instructions = dedent("""\
             You are seasoned content strategist for podcasts with deep and comprehensive expertise
@@ -115,19 +204,20 @@ def get_content_writer_agent(session_id: str):
         description = dedent("You are an experienced script writer for a podcast."),
         model = content_writer_model,
         tools = [
-            ArxivTools(),
-            GoogleSearchTools(fixed_language='en'),
-            Newspaper4kTools()
+            registry.get("arxiv_tools"),
+            registry.get("writer_search_tools"),
+            registry.get("newspaper_tools")
         ],
 
-        storage=shared_storage,
-        add_history_to_messages=True,
-        memory=team_memory,
+        storage=registry.get("shared_storage"),
+        add_history_to_messages=False,
+        memory=registry.get("team_memory"),
 
         instructions = dedent("""
             You are an experienced script writer for a podcast. You write podcasts with deep knowledge of
             of the topic specified in the prompt preferrably using tools to fact check the specific topics if required.
             Use Arxiv / Newspaper Tool if required to fact check something or for detailed researched information of the topic.
+            If research notes are provided in the context, rely on them first and only call the tools for facts they don't cover.
             
             IMPORTANT: When asked to write a script for a numbered topic (like "3rd topic"), first check the conversation
             history to see what topics were previously suggested, then write the script for the specified topic.
@@ -152,7 +242,7 @@ def get_content_writer_agent(session_id: str):
             IMPORTANT: Just reply the topics requested, do not include the chain of thoughts in the response
         """),
         markdown = True,
-        debug_mode = True,
+        debug_mode = debug_mode,
         show_tool_calls = True
     )
 
@@ -163,9 +253,9 @@ def get_content_caption_writer_agent(session_id: str):
         description = dedent("You are an experienced caption writer advertising podcasts in social media."),
         model = content_caption_writer_model,
 
-        storage=shared_storage,
-        add_history_to_messages=True,
-        memory=team_memory,
+        storage=registry.get("shared_storage"),
+        add_history_to_messages=False,
+        memory=registry.get("team_memory"),
 
         instructions = dedent("""
             You are an experienced caption writer advertising podcasts in social media.
@@ -182,7 +272,7 @@ def get_content_caption_writer_agent(session_id: str):
             IMPORTANT: Just reply the topics requested, do not include the chain of thoughts in the response
         """),
         markdown = True,
-        debug_mode = True,
+        debug_mode = debug_mode,
         show_tool_calls = True
     )
 
@@ -191,22 +281,23 @@ def get_voice_agent(session_id: str):
         name = "Text to Speech agent",
         description = dedent("Text to speech"),
         model = voice_agent_model,
-        tools = [CartesiaTools()],
+        tools = [registry.get("podcast_audio_tools")],
 
-        storage=shared_storage,
-        add_history_to_messages=True,
-        memory=team_memory,
+        storage=registry.get("shared_storage"),
+        add_history_to_messages=False,
+        memory=registry.get("team_memory"),
 
         instructions = dedent("""
             You are an Text-To-Speech agent that is reponsible to generating audio files from a given podcast script.
 
-            Strip out the unnessary parts of the script that are usually not required to be spoken like the titles, index or table of contents etc. 
-            from the text that are to be converted to speech                  
-                              
+            Call the text_to_speech tool exactly once with the podcast script as it was written. The tool removes the
+            parts that are not spoken (titles, index, table of contents, sound cues) and splits long scripts on its own,
+            so do not edit, shorten or split the script yourself.
+
             IMPORTANT: Make sure to generate only one audio file containing the entire script.
             
         """),
-        debug_mode = True,
+        debug_mode = debug_mode,
         show_tool_calls = True
     )
 
@@ -220,15 +311,15 @@ def get_agent_team(session_id: str):
             get_voice_agent(session_id)
         ],
         mode = "route",
-        debug_mode=True,
+        debug_mode=debug_mode,
         markdown=True,
-        model=gemini_model,
+        model=team_model,
         show_members_responses = True,
 
-        memory=team_memory,
-        storage=shared_storage,
-        enable_team_history = True,
-        num_of_interactions_from_history=10,
+        memory=registry.get("team_memory"),
+        storage=registry.get("shared_storage"),
+        # History is passed in as a bounded context (see context_budget.py) instead of raw past runs
+        enable_team_history = False,
 
         session_id=session_id,
         session_state={"session_id": session_id},
@@ -246,7 +337,7 @@ def get_agent_team(session_id: str):
             - For caption suggession inquiries, route to the caption writer agent
             - For audio suggestion inquiries, route to the text to speech agent. 
                               
-            IMPORTANT: When routing to the text to speech agent, forward the RAW podcast script text from history
+            IMPORTANT: When routing to the text to speech agent, forward the RAW podcast script text from the context
             to the text to speech agent as its expexted output so that it gets context to create audio files. 
 
             IMPORTANT CONTEXT HANDLING:
@@ -281,7 +372,7 @@ if __name__ == "__main__":
     
     # print("\n" + "=" * 100)
     # print("=== Storage Sessions ===")
-    # print(shared_storage.get_all_sessions())
+    # print(registry.get("shared_storage").get_all_sessions())
     
     # print("\n" + "=" * 100)
     # print("=== Second Request: Script for 3rd Topic ===")
@@ -0,0 +1,147 @@
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import List, Optional
+
+import tracing
+import sqlite_db
+import audio_stream
+
+# Content-addressed cache for generated artifacts (synthesized audio). Files are named after the
+# hash of what produced them, so the same text + voice + model is only synthesized once and a
+# new turn can never overwrite the audio of an earlier one.
+
+cache_dir = "temp/artifacts"
+MAX_CACHE_BYTES = int(os.getenv("PODCAST_ARTIFACT_CACHE_BYTES", 512 * 1024 * 1024))
+
+_lock = threading.Lock()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    session_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (session_id, key)
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_last_used ON artifacts(last_used);
+CREATE INDEX IF NOT EXISTS idx_refs_key ON refs(key);
+"""
+
+def _connection() -> sqlite3.Connection:
+    return sqlite_db.get_connection(os.path.join(cache_dir, "index.db"), SCHEMA)
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+def make_key(text: str, voice: str = "", model: str = "") -> str:
+    return hashlib.sha256(f"{model}\0{voice}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+def artifact_path(key: str, extension: str = "mp3") -> str:
+    return os.path.join(cache_dir, key[:2], f"{key}.{extension}")
+
+def contains(key: str) -> bool:
+    row = _connection().execute("SELECT path FROM artifacts WHERE key = ?", (key,)).fetchone()
+    return row is not None and os.path.exists(row[0])
+
+def get(key: str) -> Optional[bytes]:
+    conn = _connection()
+    row = conn.execute("SELECT path FROM artifacts WHERE key = ?", (key,)).fetchone()
+    if row is None or not os.path.exists(row[0]):
+        return None
+    with conn:
+        conn.execute("UPDATE artifacts SET last_used = ? WHERE key = ?", (time.time(), key))
+    with open(row[0], "rb") as f:
+        return f.read()
+
+def put(key: str, data: bytes, extension: str = "mp3") -> str:
+    path = artifact_path(key, extension)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so a concurrent reader never sees a partial artifact.
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    _index(key, path, len(data))
+    return path
+
+def register(key: str, path: str, size: int):
+    # For artifacts written in place at artifact_path(key), e.g. by a StreamingAudioWriter.
+    _index(key, path, size)
+
+def _index(key: str, path: str, size: int):
+    conn = _connection()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO artifacts (key, path, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, path, size, time.time())
+        )
+    # The new artifact is not referenced yet (its caller pins it next), so it is kept out of this eviction.
+    evict(keep=key)
+
+def add_reference(session_id: str, key: str):
+    conn = _connection()
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO refs (session_id, key) VALUES (?, ?)", (session_id, key))
+
+def release_session(session_id: str):
+    conn = _connection()
+    with conn:
+        conn.execute("DELETE FROM refs WHERE session_id = ?", (session_id,))
+
+def store_audio(base64_audio: str, session_id: str) -> str:
+    # Save a base64 audio artifact from a run response under its content hash and pin it to the session.
+    # The payload is decoded slice by slice straight to disk instead of into one large bytes object.
+    with tracing.span("audio.store") as span:
+        tmp_path = os.path.join(cache_dir, f"incoming.{threading.get_ident()}.mp3")
+        with audio_stream.StreamingAudioWriter(tmp_path) as writer:
+            audio_stream.decode_base64_to_writer(base64_audio, writer)
+        key = writer.sha256.hexdigest()
+        path = artifact_path(key)
+        add_reference(session_id, key)
+        cached = contains(key)
+        if cached:
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            register(key, path, writer.bytes_written)
+        span.set(bytes=writer.bytes_written, cached=cached)
+    return path
+
+def reference_path(path: str, session_id: str) -> str:
+    # Pin an artifact that is already in the cache (e.g. written by the TTS pipeline) to a session.
+    key = os.path.splitext(os.path.basename(path))[0]
+    add_reference(session_id, key)
+    return path
+
+def evict(max_bytes: int = None, keep: Optional[str] = None) -> List[str]:
+    # Least recently used artifacts go first; artifacts referenced by a session, and keep, are never evicted.
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    evicted = []
+    with _lock:
+        conn = _connection()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        if total <= max_bytes:
+            return evicted
+        candidates = conn.execute(
+            "SELECT key, path, size FROM artifacts WHERE key NOT IN (SELECT key FROM refs) AND key IS NOT ? ORDER BY last_used",
+            (keep,)
+        ).fetchall()
+        with conn:
+            for key, path, size in candidates:
+                if total <= max_bytes:
+                    break
+                if os.path.exists(path):
+                    os.remove(path)
+                conn.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+                total -= size
+                evicted.append(key)
+    return evicted
@@ -0,0 +1,52 @@
+import os
+import base64
+import hashlib
+import threading
+import contextvars
+from typing import Callable, Optional
+
+# Incremental audio writing: synthesized MP3 segments are appended to the output file as they
+# arrive and base64 payloads are decoded slice by slice, so memory stays bounded by the segment
+# size rather than the episode length.
+
+# 64 KiB of decoded audio per slice; must be a multiple of 4 base64 characters.
+BASE64_SLICE_CHARS = 4 * 16 * 1024
+
+# Set by the caller of a turn to hear about the first playable segment of audio while the rest of
+# the episode is still being synthesized.
+segment_listener: contextvars.ContextVar = contextvars.ContextVar("podcast_segment_listener", default=None)
+
+def notify_segment(path: str):
+    listener: Optional[Callable[[str], None]] = segment_listener.get()
+    if listener is not None:
+        listener(path)
+
+class StreamingAudioWriter:
+    # Appends to "<path>.part" and moves it to path when closed cleanly, so readers never see half a file.
+    def __init__(self, path: str):
+        self.path = path
+        self.part_path = f"{path}.{threading.get_ident()}.part"
+        self.bytes_written = 0
+        self.sha256 = hashlib.sha256()
+        self._file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.part_path, "wb")
+        return self
+
+    def write(self, data: bytes):
+        self._file.write(data)
+        self.sha256.update(data)
+        self.bytes_written += len(data)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is None:
+            os.replace(self.part_path, self.path)
+        elif os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+def decode_base64_to_writer(base64_audio: str, writer: StreamingAudioWriter):
+    for start in range(0, len(base64_audio), BASE64_SLICE_CHARS):
+        writer.write(base64.b64decode(base64_audio[start:start + BASE64_SLICE_CHARS]))
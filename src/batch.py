@@ -0,0 +1,149 @@
+import os
+import csv
+import json
+import time
+import shutil
+import logging
+import argparse
+import threading
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import dotenv
+
+import agents
+import pipeline
+import rate_limits
+import session_store
+from rate_limits import RateLimiter
+
+# Headless batch runner: reads items from a JSONL or CSV file and runs each one through the agent
+# team, several at a time. Every item gets its own session, so an item can be a sequence of prompts
+# ("suggest topics" -> "write a script for topic 1" -> "convert it to audio").
+#
+#   python src/batch.py prompts.jsonl --out temp/batch --concurrency 4 --rate gemini=30/60
+#
+# JSONL lines look like {"id": "ai-trends", "prompts": ["...", "..."]} (or "prompt": "..."); CSV files
+# need an id and a prompt column, rows with the same id form one item. Finished items are
+# checkpointed in <out>/checkpoint.jsonl and skipped when the run is started again. Rate limits
+# apply to every call to the provider (see rate_limits.py), not to every turn.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATES = {"gemini": "30/60", "cartesia": "10/60"}
+
+def parse_rates(values: List[str]) -> Dict[str, RateLimiter]:
+    rates = dict(DEFAULT_RATES)
+    for value in values or []:
+        provider, limit = value.split("=", 1)
+        rates[provider] = limit
+    limiters = {}
+    for provider, limit in rates.items():
+        calls, period = limit.split("/", 1)
+        limiters[provider] = RateLimiter(int(calls), float(period))
+    return limiters
+
+def load_items(path: str) -> List[Dict]:
+    items: Dict[str, Dict] = {}
+    with open(path, "r", newline="") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    for index, row in enumerate(rows):
+        item_id = str(row.get("id") or index)
+        prompts = row.get("prompts") or row["prompt"]
+        # A single prompt may be given as a string in either column.
+        if isinstance(prompts, str):
+            prompts = [prompts]
+        items.setdefault(item_id, {"id": item_id, "prompts": []})["prompts"].extend(prompts)
+    return list(items.values())
+
+def load_checkpoint(path: str) -> Dict[str, Dict]:
+    done = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                entry = json.loads(line)
+                done[entry["id"]] = entry
+    return done
+
+def run_item(item: Dict, out_dir: str) -> Dict:
+    # A fresh session per attempt, so a resumed item doesn't see the history of an interrupted one
+    session_id = f"batch-{item['id']}-{int(time.time())}"
+    session_store.create_session(session_id, summary=f"Batch: {item['id']}")
+    team = agents.get_agent_team(session_id)
+    item_dir = os.path.join(out_dir, item["id"])
+    os.makedirs(item_dir, exist_ok=True)
+
+    steps = []
+    start_time = time.perf_counter()
+    for step, prompt in enumerate(item["prompts"], start=1):
+        history = session_store.load_messages(session_id)
+        session_store.append_message(session_id, {"role": "user", "content": prompt})
+        result = pipeline.run_turn(team, prompt, session_id, history)
+        session_store.append_message(session_id, {"role": "assistant", "content": result.text})
+        session_store.append_message(session_id, {"role": "assistant", "content": result.audio_files})
+
+        with open(os.path.join(item_dir, f"step_{step}.md"), "w") as f:
+            f.write(result.text)
+        audio_files = []
+        for i, audio_file in enumerate(result.audio_files):
+            target = os.path.join(item_dir, f"step_{step}_{i}.mp3")
+            shutil.copyfile(audio_file, target)
+            audio_files.append(target)
+
+        steps.append({
+            "prompt": prompt,
+            "routed_by": result.routed_by,
+            "member": result.member,
+            "elapsed": result.elapsed,
+            "first_token_time": result.first_token_time,
+            "prompt_tokens": result.prompt_tokens,
+            "audio_files": audio_files,
+        })
+
+    return {"id": item["id"], "session_id": session_id, "elapsed": time.perf_counter() - start_time, "steps": steps}
+
+def run_batch(input_file: str, out_dir: str, concurrency: int, limiters: Dict[str, RateLimiter]) -> Dict:
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint_file = os.path.join(out_dir, "checkpoint.jsonl")
+    done = load_checkpoint(checkpoint_file)
+    items = [item for item in load_items(input_file) if item["id"] not in done]
+    logger.info("%d items to run, %d already done", len(items), len(done))
+
+    rate_limits.configure(limiters)
+    checkpoint_lock = threading.Lock()
+    failed = []
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(run_item, item, out_dir): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                logger.error("Item %s failed: %s", item["id"], e)
+                failed.append(item["id"])
+                continue
+            with checkpoint_lock, open(checkpoint_file, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+            logger.info("Item %s done in %.1fs", item["id"], entry["elapsed"])
+
+    return {"ran": len(items) - len(failed), "failed": failed, "skipped": len(done), "elapsed": time.perf_counter() - start_time}
+
+if __name__ == "__main__":
+    dotenv.load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    parser = argparse.ArgumentParser(description="Generate podcasts in bulk from a JSONL or CSV prompt file.")
+    parser.add_argument("input", help="JSONL or CSV file with the prompts")
+    parser.add_argument("--out", default="temp/batch", help="output directory (holds the checkpoint too)")
+    parser.add_argument("--concurrency", type=int, default=4, help="items run at the same time")
+    parser.add_argument("--rate", action="append", metavar="PROVIDER=CALLS/SECONDS",
+                        help="rate limit per provider, e.g. gemini=30/60 (repeatable)")
+    args = parser.parse_args()
+
+    summary = run_batch(args.input, args.out, args.concurrency, parse_rates(args.rate))
+    print(json.dumps(summary, indent=4))
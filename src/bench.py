@@ -0,0 +1,327 @@
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import functools
+import argparse
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List
+
+from agno.models.base import Model
+from agno.models.message import Message
+from agno.models.response import ModelResponse
+
+# Offline benchmark: the Gemini model, the search / news / arXiv tools and the TTS backend are
+# replaced with deterministic local stand-ins with configurable latency, then the full Team route
+# flow and the session store are driven as the app would. Reports per-stage p50 / p95 so every
+# performance change has a baseline to compare against. No API keys or network needed. The stand-ins
+# sit underneath the tool cache and tracing wrappers, as the real tools do. The semantic response
+# cache is off unless --response-cache is given, since it would answer repeated prompts without a run.
+#
+#   python src/bench.py --turns 20 --llm-latency 0.2 --tool-latency 0.1 --tts-latency 0.05
+
+timings: Dict[str, List[float]] = defaultdict(list)
+
+class timed:
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args):
+        timings[self.stage].append(time.perf_counter() - self.start)
+
+# Stand-ins ---------------------------------------------------------------------------------------------------------
+
+CANNED_RESPONSES = {
+    "topic": "\n".join(
+        f"# Topic {i}: Benchmark topic {i}\n- **Description**: A topic.\n- **Justification**: It is trending."
+        for i in range(1, 6)
+    ),
+    "script": "## Hook\n🎧 \"intro music\"\n" + "\n\n".join(
+        f"## Chapter {i}\nHost: " + "This is a sentence of the benchmark script. " * 40 for i in range(1, 6)
+    ),
+    "caption": "🎙️ New episode out now! Tap the link to listen. #podcast #tech",
+    "default": "Done.",
+}
+
+@dataclass
+class MockModel(Model):
+    # Deterministic local model: sleeps for `latency`, routes team requests with the local router and
+    # answers member agents with canned text. Calls the first tool it is offered once per run.
+    id: str = "mock-model"
+    name: str = "MockModel"
+    provider: str = "Mock"
+    latency: float = 0.2
+    stream_chunks: int = 20
+
+    def _offered_tools(self, kwargs) -> List[Dict]:
+        tools = kwargs.get("tools") or getattr(self, "_tools", None) or []
+        return [t.get("function", t) if isinstance(t, dict) else {"name": getattr(t, "name", "")} for t in tools]
+
+    def _respond(self, messages: List[Message], kwargs) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        import router
+
+        tool_names = [t.get("name") for t in self._offered_tools(kwargs)]
+        last_user = next((m.get_content_string() for m in reversed(messages) if m.role == "user"), "")
+        used_tool = any(m.role == "tool" for m in messages)
+
+        if "forward_task_to_member" in tool_names and not used_tool:
+            member = router.route(last_user).member or router.TOPIC_AGENT
+            member_id = member.lower().replace(" ", "-")
+            return self._tool_call("forward_task_to_member", {"member_id": member_id, "expected_output": last_user})
+        if "text_to_speech" in tool_names and not used_tool:
+            return self._tool_call("text_to_speech", {"script": CANNED_RESPONSES["script"]})
+        if "google_search" in tool_names and not used_tool:
+            return self._tool_call("google_search", {"query": last_user[:80]})
+
+        system = next((m.get_content_string() for m in messages if m.role == "system"), "").lower()
+        if "content strategist" in system:
+            return {"content": CANNED_RESPONSES["topic"]}
+        if "script writer" in system:
+            return {"content": CANNED_RESPONSES["script"]}
+        if "caption writer" in system:
+            return {"content": CANNED_RESPONSES["caption"]}
+        return {"content": CANNED_RESPONSES["default"]}
+
+    def _tool_call(self, name: str, arguments: Dict) -> Dict[str, Any]:
+        call_id = f"call_{random.randrange(1 << 32):x}"
+        return {"tool_calls": [{"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}]}
+
+    def invoke(self, messages: List[Message], **kwargs) -> Dict[str, Any]:
+        return self._respond(messages, kwargs)
+
+    async def ainvoke(self, messages: List[Message], **kwargs) -> Dict[str, Any]:
+        return self._respond(messages, kwargs)
+
+    def invoke_stream(self, messages: List[Message], **kwargs) -> Iterator[Dict[str, Any]]:
+        response = self._respond(messages, kwargs)
+        if response.get("tool_calls"):
+            yield response
+            return
+        content = response["content"]
+        size = max(1, len(content) // self.stream_chunks)
+        for i in range(0, len(content), size):
+            yield {"content": content[i:i + size]}
+
+    async def ainvoke_stream(self, messages: List[Message], **kwargs):
+        for chunk in self.invoke_stream(messages, **kwargs):
+            yield chunk
+
+    def parse_provider_response(self, response: Dict[str, Any], **kwargs) -> ModelResponse:
+        return ModelResponse(role="assistant", content=response.get("content"), tool_calls=response.get("tool_calls") or [])
+
+    def parse_provider_response_delta(self, response: Dict[str, Any], **kwargs) -> ModelResponse:
+        return self.parse_provider_response(response)
+
+def _stand_in(method, fake):
+    # Replaces a toolkit method while keeping its signature, which agno turns into the tool schema.
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return fake(*args, **kwargs)
+    return wrapper
+
+def install_stand_ins(llm_latency: float, tool_latency: float, tts_latency: float, response_cache_enabled: bool = False,
+                      patch: Callable[[Any, str, Any], None] = setattr):
+    # Module globals and classes are replaced through patch, so tests can pass monkeypatch.setattr and
+    # have them restored afterwards.
+    import agents
+    import research
+    import tool_cache
+    import tts_pipeline
+    import response_cache
+    from agno.tools.arxiv import ArxivTools
+    from agno.tools.googlesearch import GoogleSearchTools
+    from agno.tools.newspaper4k import Newspaper4kTools
+
+    patch(response_cache, "ENABLED", response_cache_enabled)
+    if response_cache_enabled:
+        patch(response_cache, "embedder", response_cache.HashEmbedder())
+
+    # Every provider of every model pool answers with the mock
+    model = MockModel(latency=llm_latency)
+    for name in ["gemini", "groq", "ollama"]:
+        agents.registry.set(name, model)
+
+    def fake_search(query: str = "", **kwargs):
+        with timed("tool.google_search"):
+            time.sleep(tool_latency)
+            return json.dumps([{"title": f"Result {i}", "url": f"http://localhost/{i}", "description": query} for i in range(5)])
+
+    def fake_read_article(url: str = "", **kwargs):
+        with timed("tool.read_article"):
+            time.sleep(tool_latency)
+            return "Article text. " * 50
+
+    # The toolkit classes get the fakes, then the toolkits are rebuilt by their registry factories so
+    # the cache and tracing wrappers are applied on top of them.
+    for toolkit_class, name, fake in [
+        (GoogleSearchTools, "google_search", fake_search),
+        (Newspaper4kTools, "read_article", fake_read_article),
+        (ArxivTools, "search_arxiv_and_return_articles", fake_search),
+        (ArxivTools, "read_arxiv_papers", fake_read_article),
+    ]:
+        patch(toolkit_class, name, _stand_in(getattr(toolkit_class, name), fake))
+    for toolkit_name in ["strategist_search_tools", "writer_search_tools", "newspaper_tools", "arxiv_tools"]:
+        agents.registry.set(toolkit_name, agents.registry.factories[toolkit_name]())
+
+    patch(research, "search_web", tool_cache.cached("search_web")(lambda query, max_results: (time.sleep(tool_latency), [
+        {"title": f"Result {i}", "url": f"http://localhost/{i}", "description": query} for i in range(max_results)
+    ])[1]))
+    patch(research, "fetch_article", tool_cache.cached("fetch_article")(
+        lambda url: (time.sleep(tool_latency), {"url": url, "title": url, "text": "Article text. " * 50})[1]
+    ))
+    patch(research, "search_papers", tool_cache.cached("search_papers")(lambda query, max_results: (time.sleep(tool_latency), [
+        {"title": "Paper", "url": "http://localhost/paper", "summary": "Abstract."} for _ in range(max_results)
+    ])[1]))
+
+    backend = tts_pipeline.StubTTSBackend(latency=tts_latency)
+    synthesize = backend.synthesize
+
+    def timed_synthesize(text: str) -> bytes:
+        with timed("tts.chunk"):
+            return synthesize(text)
+
+    backend.synthesize = timed_synthesize
+    patch(agents.registry.get("podcast_audio_tools"), "backend", backend)
+
+# Benchmarks --------------------------------------------------------------------------------------------------------
+
+PROMPTS = [
+    "Suggest 5 podcast topics about tech trends.",
+    "Write a podcast script for the 3rd topic you mentioned.",
+    "Write an instagram caption for this episode.",
+    "Convert the script to audio.",
+    "What do you think works best?",
+]
+
+def bench_turns(turns: int):
+    import agents
+    import pipeline
+    import session_store
+
+    session_id = "bench-session"
+    session_store.create_session(session_id)
+    team = agents.get_agent_team(session_id)
+    for i in range(turns):
+        prompt = PROMPTS[i % len(PROMPTS)]
+        with timed("storage.load_messages"):
+            history = session_store.load_messages(session_id)
+        with timed("storage.append_message"):
+            session_store.append_message(session_id, {"role": "user", "content": prompt})
+        with timed("turn.total"):
+            result = pipeline.run_turn(team, prompt, session_id, history)
+        timings[f"turn.{result.routed_by}_routed"].append(result.elapsed)
+        if result.first_token_time is not None:
+            timings["turn.first_token"].append(result.first_token_time)
+        with timed("storage.append_message"):
+            session_store.append_message(session_id, {"role": "assistant", "content": result.text})
+            session_store.append_message(session_id, {"role": "assistant", "content": result.audio_files})
+
+# Shared by every agent since the team is cached per session; before that, each rerun built its own.
+TOOLKITS = [
+    "strategist_search_tools", "writer_search_tools", "reasoning_tools",
+    "arxiv_tools", "newspaper_tools", "podcast_audio_tools",
+]
+
+def bench_reruns(reruns: int):
+    # What a Streamlit rerun pays to get the session's team: rebuilding the agents and their toolkits
+    # every time (as before the team cache) vs looking the team up in the per-session cache.
+    import agents
+
+    session_id = "rerun-session"
+    shared = {name: agents.registry.get(name) for name in TOOLKITS}
+    for _ in range(reruns):
+        with timed("rerun.rebuild_team"):
+            for name in TOOLKITS:
+                agents.registry.set(name, agents.registry.factories[name]())
+            agents.get_agent_team(session_id)
+    for name, toolkit in shared.items():
+        agents.registry.set(name, toolkit)
+
+    # Stands in for st.cache_resource, a dict lookup keyed by the session id.
+    cache = {}
+    for _ in range(reruns):
+        with timed("rerun.cached_team"):
+            if session_id not in cache:
+                cache[session_id] = agents.get_agent_team(session_id)
+
+def bench_storage(sessions: int, messages_per_session: int) -> List[Dict]:
+    # Persistence cost as the history grows: the session store vs rewriting the old conversations.json.
+    import session_store
+
+    message = {"role": "assistant", "content": CANNED_RESPONSES["script"]}
+    legacy = {"sessions": []}
+    growth = []
+    for s in range(sessions):
+        session_id = f"storage-{s}"
+        session_store.create_session(session_id)
+        legacy["sessions"].insert(0, {"session_id": session_id, "summary": "New Session", "messages": []})
+        for _ in range(messages_per_session):
+            with timed("storage.append_message"):
+                session_store.append_message(session_id, message)
+            legacy["sessions"][0]["messages"].append(message)
+        with timed("storage.legacy_json_rewrite"):
+            with open("temp/conversations_legacy.json", "w") as f:
+                json.dump(legacy, f, indent=4)
+        with timed("storage.load_messages"):
+            session_store.load_messages(session_id)
+        if (s + 1) % max(1, sessions // 5) == 0:
+            growth.append({
+                "sessions": s + 1,
+                "append_ms": timings["storage.append_message"][-1] * 1000,
+                "legacy_rewrite_ms": timings["storage.legacy_json_rewrite"][-1] * 1000,
+            })
+    return growth
+
+def percentile(values: List[float], q: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+def report() -> Dict[str, Dict[str, float]]:
+    return {
+        stage: {
+            "count": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "mean_ms": statistics.mean(values) * 1000,
+        }
+        for stage, values in sorted(timings.items()) if values
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark with mock LLM, search and TTS backends.")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--reruns", type=int, default=20, help="reruns for the team construction benchmark")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions for the storage benchmark")
+    parser.add_argument("--messages", type=int, default=10, help="messages per session for the storage benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--tool-latency", type=float, default=0.1)
+    parser.add_argument("--tts-latency", type=float, default=0.05)
+    parser.add_argument("--response-cache", action="store_true", help="keep the semantic response cache on, to benchmark it")
+    parser.add_argument("--out", help="write the report as JSON to this file")
+    args = parser.parse_args()
+    out_file = os.path.abspath(args.out) if args.out else None
+
+    # Every store uses paths under temp/, so running from a scratch directory keeps the benchmark isolated.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(tempfile.mkdtemp(prefix="podcast-bench-"))
+    os.makedirs("temp", exist_ok=True)
+
+    install_stand_ins(args.llm_latency, args.tool_latency, args.tts_latency, args.response_cache)
+    bench_turns(args.turns)
+    bench_reruns(args.reruns)
+    growth = bench_storage(args.sessions, args.messages)
+
+    results = {"stages": report(), "storage_growth": growth}
+    print(json.dumps(results, indent=4))
+    if out_file:
+        with open(out_file, "w") as f:
+            json.dump(results, f, indent=4)
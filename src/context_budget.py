@@ -0,0 +1,102 @@
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import router
+
+# Bounded conversation context: instead of replaying the raw history on every turn, each agent gets
+# a context that fits its token budget. The latest numbered topic list and the latest script are
+# kept verbatim (later turns refer to them), recent turns are kept as they are while they fit, and
+# everything older is compressed into a one-line-per-turn summary.
+
+TEAM = "PodcastAI Agent Team"
+
+@dataclass
+class ContextPolicy:
+    budget: int
+    pin_topics: bool = True
+    pin_script: bool = False
+
+POLICIES: Dict[str, ContextPolicy] = {
+    TEAM: ContextPolicy(budget=3000, pin_topics=True, pin_script=True),
+    router.TOPIC_AGENT: ContextPolicy(budget=1500),
+    # Follow-ups like "make the script shorter" edit the latest script, which takes most of the budget.
+    router.WRITER_AGENT: ContextPolicy(budget=4500, pin_script=True),
+    router.CAPTION_AGENT: ContextPolicy(budget=2000, pin_script=True),
+    # The script reaches the voice agent in its message (router.build_member_message or the team's
+    # delegation), so pinning it here as well would send it twice.
+    router.VOICE_AGENT: ContextPolicy(budget=0, pin_topics=False),
+}
+
+SUMMARY_LINE_CHARS = 160
+# Share of the budget the rolling summary may take; recent turns get the rest.
+SUMMARY_SHARE = 0.25
+
+def estimate_tokens(text: str) -> int:
+    # Roughly 4 characters per token for English text; good enough for budgeting.
+    return math.ceil(len(text) / 4)
+
+def _turns(messages: List[Dict]) -> List[Tuple[str, str]]:
+    return [(m["role"], m["content"]) for m in messages if isinstance(m["content"], str) and m["content"].strip()]
+
+def _summary_line(role: str, text: str) -> str:
+    first_line = next((line.strip(" #*") for line in text.splitlines() if line.strip(" #*")), "")
+    if len(first_line) > SUMMARY_LINE_CHARS:
+        first_line = first_line[:SUMMARY_LINE_CHARS].rsplit(" ", 1)[0] + "..."
+    return f"- {role}: {first_line}"
+
+def build_context(messages: List[Dict], policy: ContextPolicy) -> Tuple[str, int]:
+    # Returns the context text and its estimated token count.
+    sections = []
+    used = 0
+
+    pinned = []
+    if policy.pin_topics:
+        topics = router.find_latest_topics(messages)
+        if topics:
+            pinned.append(topics)
+            sections.append(f"## Latest suggested topics\n{topics}")
+    if policy.pin_script:
+        script = router.find_latest_script(messages)
+        if script:
+            pinned.append(script)
+            sections.append(f"## Latest podcast script\n{script}")
+    used += sum(estimate_tokens(text) for text in sections)
+
+    turns = [turn for turn in _turns(messages) if turn[1] not in pinned]
+    remaining = max(0, policy.budget - used)
+
+    # Recent turns verbatim, newest first, while they fit in what the summary leaves over.
+    recent = []
+    recent_budget = int(remaining * (1 - SUMMARY_SHARE))
+    while turns and estimate_tokens(turns[-1][1]) <= recent_budget:
+        role, text = turns.pop()
+        recent.insert(0, f"{role}: {text}")
+        recent_budget -= estimate_tokens(text)
+    remaining -= sum(estimate_tokens(text) for text in recent)
+
+    # Older turns as a rolling summary; the oldest lines are dropped once it no longer fits.
+    summary = []
+    for role, text in reversed(turns):
+        line = _summary_line(role, text)
+        if estimate_tokens(line) > remaining:
+            break
+        summary.insert(0, line)
+        remaining -= estimate_tokens(line)
+
+    if summary:
+        sections.append("## Summary of earlier conversation\n" + "\n".join(summary))
+    if recent:
+        sections.append("## Recent conversation\n" + "\n\n".join(recent))
+
+    context = "\n\n".join(sections)
+    return context, estimate_tokens(context)
+
+def build_context_for(name: str, messages: List[Dict]) -> Tuple[str, int]:
+    return build_context(messages, POLICIES.get(name, POLICIES[TEAM]))
+
+def prompt_tokens(run_response) -> int:
+    # Input tokens reported by the model provider for a finished run, summed over every model call.
+    metrics = getattr(run_response, "metrics", None) or {}
+    input_tokens = metrics.get("input_tokens", 0)
+    return sum(input_tokens) if isinstance(input_tokens, list) else int(input_tokens or 0)
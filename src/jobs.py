@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import traceback
+from typing import Callable, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlite_db
+
+# Background job runner: long generations (scripts, audio) run on a worker pool instead of the
+# Streamlit request thread. Jobs and their partial output are kept in SQLite, so the UI can poll
+# them, a browser refresh re-attaches to the running job and sessions don't block each other.
+
+logger = logging.getLogger(__name__)
+
+jobs_db_file = "temp/jobs.db"
+MAX_WORKERS = int(os.getenv("PODCAST_JOB_WORKERS", 4))
+# Partial output is written at most this often while a job streams.
+UPDATE_INTERVAL = 0.5
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="podcast-job")
+_recovered = False
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    status TEXT NOT NULL,
+    partial_output TEXT NOT NULL DEFAULT '',
+    partial_audio TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_session_status ON jobs(session_id, status);
+"""
+
+def _connection() -> sqlite3.Connection:
+    return sqlite_db.get_connection(jobs_db_file, SCHEMA)
+
+def _update(job_id: str, **fields):
+    fields["updated_at"] = time.time()
+    columns = ", ".join(f"{name} = ?" for name in fields)
+    conn = _connection()
+    with conn:
+        conn.execute(f"UPDATE jobs SET {columns} WHERE job_id = ?", (*fields.values(), job_id))
+
+class JobHandle:
+    # Passed to the job function so it can report partial output while it runs.
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._last_update = 0.0
+
+    def update(self, partial_output: str, force: bool = False):
+        now = time.monotonic()
+        if force or now - self._last_update >= UPDATE_INTERVAL:
+            _update(self.job_id, partial_output=partial_output)
+            self._last_update = now
+
+    def set_partial_audio(self, path: str):
+        # The first synthesized segment, playable while the rest of the episode is generated.
+        _update(self.job_id, partial_audio=path)
+
+def _run(job_id: str, fn: Callable[[JobHandle], Dict]):
+    _update(job_id, status=RUNNING)
+    try:
+        result = fn(JobHandle(job_id))
+        _update(job_id, status=DONE, result=json.dumps(result))
+    except Exception as e:
+        logger.error("Job %s failed:\n%s", job_id, traceback.format_exc())
+        _update(job_id, status=FAILED, error=f"{type(e).__name__}: {e}")
+
+def recover_interrupted():
+    # Jobs that were queued or running when the previous process stopped will never finish.
+    global _recovered
+    if _recovered:
+        return
+    _recovered = True
+    conn = _connection()
+    with conn:
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status IN (?, ?)",
+            (FAILED, "Interrupted by a restart", time.time(), QUEUED, RUNNING)
+        )
+
+def submit(session_id: str, prompt: str, fn: Callable[[JobHandle], Dict]) -> Optional[str]:
+    # One job per session at a time: returns None without starting anything while the session has a
+    # queued or running job (e.g. a second tab on the same session), since both would share its Team.
+    recover_interrupted()
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    conn = _connection()
+    with conn:
+        # Takes the write lock up front, so the check and the insert can't interleave with another submit.
+        conn.execute("BEGIN IMMEDIATE")
+        inserted = conn.execute(
+            "INSERT INTO jobs (job_id, session_id, prompt, status, created_at, updated_at) SELECT ?, ?, ?, ?, ?, ? "
+            "WHERE NOT EXISTS (SELECT 1 FROM jobs WHERE session_id = ? AND status IN (?, ?))",
+            (job_id, session_id, prompt, QUEUED, now, now, session_id, QUEUED, RUNNING)
+        ).rowcount
+    if not inserted:
+        return None
+    _executor.submit(_run, job_id, fn)
+    return job_id
+
+def get_job(job_id: str) -> Optional[Dict]:
+    row = _connection().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+def get_active_job(session_id: str) -> Optional[Dict]:
+    recover_interrupted()
+    row = _connection().execute(
+        "SELECT job_id FROM jobs WHERE session_id = ? AND status IN (?, ?) ORDER BY created_at DESC LIMIT 1",
+        (session_id, QUEUED, RUNNING)
+    ).fetchone()
+    return get_job(row["job_id"]) if row else None
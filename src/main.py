@@ -1,80 +1,111 @@
 import agents
-
-from typing import Iterator
-from agno.agent import RunResponse
-from textwrap import dedent
-from agno.utils.pprint import pprint_run_response
-
-from agno.memory.v2.memory import Memory
-from agno.storage.sqlite import SqliteStorage
-from agno.utils.audio import write_audio_to_file
+import session_store
+import pipeline
+import jobs
+import tracing
+import titles
+import response_cache
+import tool_cache
 
 import streamlit as st
 from streamlit_lottie import st_lottie
-import pandas as pd
-import numpy as np
 import time
-import re
 import os
 import json
 import dotenv
 import secrets
+import logging
 
 # Load API keys as environmental variables
 dotenv.load_dotenv()
 conversations_file = "temp/conversations.json"
+logger = logging.getLogger(__name__)
 
 # Helper functions: --------------------------------------------------------------------------------------------------
 def load_json(filepath: str):
     with open(filepath, 'r') as f:
         return json.load(f)
 
-def strip_think_sections(text: str) -> str:
-    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL)
-
 def get_session_id():
     return str(secrets.randbits(64))
 
-EMPTY_SESSIONS_DATA = {"sessions": []}
-
 # Ensure directory exists
-os.makedirs(os.path.dirname(conversations_file), exist_ok=True)
+os.makedirs("temp", exist_ok=True)
 # Session Data ------------------------------------------------------------------------------------------------------
 
-# Load or initialize sessions data
-if not os.path.exists(conversations_file):
-    with open(conversations_file, 'w') as f:
-        json.dump(EMPTY_SESSIONS_DATA, f)
+SESSIONS_PAGE_SIZE = 20
+# Messages rendered at first; "Load earlier messages" adds another page.
+MESSAGES_PAGE_SIZE = 20
+JOB_POLL_SECONDS = 1
 
-with open(conversations_file, 'r') as f:
-    session_conversation_data = json.load(f)
-    # If no sessions exist, create one
-    if not session_conversation_data.get("sessions"):
-        new_id = get_session_id()
-        session_conversation_data["sessions"].append({"session_id": new_id, "summary": "New Session", "messages": []})
-        with open(conversations_file, 'w') as fw:
-            json.dump(session_conversation_data, fw, indent=4)
+# Import the old conversations.json store once, then work off the indexed session store
+session_store.migrate_from_json(conversations_file)
+
+# If no sessions exist, create one
+if session_store.count_sessions() == 0:
+    session_store.create_session(get_session_id())
+
+def open_session(session_id: str, summary: str, messages: list):
+    st.session_state['current_session_id'] = session_id
+    st.session_state['summary'] = summary
+    st.session_state['messages'] = messages
+    st.session_state['messages_window'] = MESSAGES_PAGE_SIZE
+    # Audio files whose player was opened; older episodes only get a player on request.
+    st.session_state['loaded_audio'] = set()
+    # Selects the session in the sidebar before the selectbox is drawn
+    st.session_state['sidebar_select'] = session_id
 
 # Initialize Streamlit session state
 if 'current_session_id' not in st.session_state:
-    first_session = session_conversation_data['sessions'][0]
-    st.session_state['current_session_id'] = first_session['session_id']
-    st.session_state['summary'] = first_session['summary']
-    st.session_state['messages'] = first_session['messages']
+    first_session = session_store.list_sessions(limit=1)[0]
+    open_session(first_session['session_id'], first_session['summary'], session_store.load_messages(first_session['session_id']))
+
+if 'sessions_limit' not in st.session_state:
+    st.session_state['sessions_limit'] = SESSIONS_PAGE_SIZE
+
+# Streamlit re-executes this script on every interaction; keep one team per session instead of
+# rebuilding every agent and toolkit on each rerun. Idle teams are evicted (LRU + TTL). The team is
+# only built once a prompt is sent, so rendering the page never imports the model and tool SDKs.
+TEAM_CACHE_MAX_ENTRIES = 32
+TEAM_CACHE_TTL_SECONDS = 60 * 60
 
-team = agents.get_agent_team(st.session_state['current_session_id'])
+@st.cache_resource(max_entries=TEAM_CACHE_MAX_ENTRIES, ttl=TEAM_CACHE_TTL_SECONDS, show_spinner=False)
+def get_team(session_id: str):
+    return agents.get_agent_team(session_id)
 
 # Callback to switch sessions
 def switch_session():
-    selected_summary = st.session_state['sidebar_select']
-    selected_id = next(s['session_id'] for s in session_conversation_data['sessions']
-                       if s['summary'] == selected_summary)
-    st.session_state['current_session_id'] = selected_id
-    for sess in session_conversation_data['sessions']:
-        if sess['session_id'] == selected_id:
-            st.session_state['messages'] = sess.get('messages', [])
-            st.session_state['summary'] = sess.get('summary', "No Summary")
-            break
+    # The selectbox holds session ids, so sessions with the same summary stay distinct.
+    selected_id = st.session_state['sidebar_select']
+    session = session_store.get_session(selected_id)
+    open_session(
+        selected_id,
+        session.get('summary', "No Summary") if session else "No Summary",
+        session_store.load_messages(selected_id)
+    )
+
+def load_more_sessions():
+    st.session_state['sessions_limit'] += SESSIONS_PAGE_SIZE
+
+def load_earlier_messages():
+    st.session_state['messages_window'] += MESSAGES_PAGE_SIZE
+
+def load_audio(audio_file: str):
+    st.session_state['loaded_audio'].add(audio_file)
+
+def session_labels(sessions: dict) -> dict:
+    # Streamlit tells options apart by their label, so sessions with the same summary (every new one is
+    # "New Session") get the end of their id added; the full id only if that still collides.
+    counts = {}
+    for session in sessions.values():
+        counts[session['summary']] = counts.get(session['summary'], 0) + 1
+    labels = {
+        session_id: session['summary'] if counts[session['summary']] == 1 else f"{session['summary']} · {session_id[-4:]}"
+        for session_id, session in sessions.items()
+    }
+    if len(set(labels.values())) < len(labels):
+        labels = {session_id: f"{session['summary']} · {session_id}" for session_id, session in sessions.items()}
+    return labels
 
 # UI -------------------------------------------------------------------------------------------------------------------------
 def render_sidebar():
@@ -83,30 +114,85 @@ def render_sidebar():
         if st.button(":heavy_plus_sign: New Chat"):
             # create and switch to new session
             new_id = get_session_id()
-            session_conversation_data['sessions'].insert(0, {"session_id": new_id, "summary": "New Session", "messages": []})
-            st.session_state['current_session_id'] = new_id
-            st.session_state['messages'] = []
-            # persist
-            with open(conversations_file, 'w') as f:
-                json.dump(session_conversation_data, f, indent=4)
-
-        session_id_map = {s['summary']: s['session_id'] for s in session_conversation_data['sessions']}
-        summaries = list(session_id_map.keys())
-        current_summary = next(s['summary'] for s in session_conversation_data['sessions']
-                            if s['session_id'] == st.session_state['current_session_id'])
+            session_store.create_session(new_id)
+            open_session(new_id, session_store.DEFAULT_SUMMARY, [])
 
+        current_id = st.session_state['current_session_id']
+        sessions = {s['session_id']: s for s in session_store.list_sessions(limit=st.session_state['sessions_limit'])}
+        if current_id not in sessions:
+            current = session_store.get_session(current_id)
+            if current:
+                sessions = {current_id: current, **sessions}
+
+        labels = session_labels(sessions)
         st.selectbox(
             "Sessions",
-            summaries,
-            index=summaries.index(current_summary),
+            list(sessions),
+            format_func=labels.get,
             key='sidebar_select',
             on_change=switch_session
         )
 
+        if titles.is_pending(st.session_state['current_session_id']):
+            watch_title(st.session_state['current_session_id'])
+
+        if session_store.count_sessions() > st.session_state['sessions_limit']:
+            st.button("Load more sessions", on_click=load_more_sessions)
+
+        render_debug_panel()
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def watch_title(session_id: str):
+    # The title is generated in the background after the turn; show it as soon as it is stored.
+    if not titles.is_pending(session_id):
+        st.session_state['summary'] = session_store.get_session(session_id)['summary']
+        st.rerun()
+
+def render_debug_panel():
+    # Where the last turn of this session spent its time, from the recorded trace.
+    with st.expander("Debug: last turn timings"):
+        cache_metrics = response_cache.get_metrics()
+        if cache_metrics:
+            st.caption("Response cache hit rate: " + ", ".join(
+                f"{role} {counts['hit_rate']:.0%} ({counts['hits']}/{counts['hits'] + counts['misses']})"
+                for role, counts in cache_metrics.items()
+            ))
+        tool_metrics = tool_cache.get_metrics()
+        if tool_metrics:
+            st.caption("Tool cache hit rate: " + ", ".join(
+                f"{tool} {counts['hit_rate']:.0%} ({counts['hits']}/{counts['hits'] + counts['misses']})"
+                for tool, counts in tool_metrics.items()
+            ))
+        # Reading the traces file can mean scanning all of it, so it only happens when asked for.
+        if not st.button("Load last turn timings"):
+            return
+        traces = tracing.load_traces(st.session_state['current_session_id'], limit=1)
+        if not traces:
+            st.caption("No turns recorded for this session yet.")
+            return
+        last_trace = traces[0]
+        st.caption(f"Total: {last_trace['duration'] * 1000:.0f} ms")
+        spans = sorted(last_trace['spans'], key=lambda span: span['start'])
+        st.dataframe(
+            [{"stage": span['name'], "ms": round(span['duration'] * 1000, 1), "details": json.dumps(span['attributes'], default=str)}
+             for span in spans],
+            hide_index=True
+        )
+
 
 def restore_session():
+    # Only the last messages_window messages are rendered on each rerun.
     st.title("PodcastAI.")
-    for message in st.session_state['messages']:
+    messages = st.session_state['messages']
+    start = max(0, len(messages) - st.session_state['messages_window'])
+    if start > 0:
+        st.button(f"Load earlier messages ({start} more)", on_click=load_earlier_messages)
+
+    # The newest episode gets its player right away; older ones are loaded when asked for
+    latest_audio = next((i for i in range(len(messages) - 1, -1, -1)
+                         if isinstance(messages[i]['content'], list) and messages[i]['content']), None)
+    for index in range(start, len(messages)):
+        message = messages[index]
         if isinstance(message['content'], list) and not message['content']:
             continue
         with st.chat_message(message['role']):
@@ -114,86 +200,90 @@ def restore_session():
                 st.markdown(message['content'])
             elif isinstance(message['content'], list):
                 for audio_file in message['content']:
-                    st.audio(audio_file, format="audio/mpeg")
+                    if index == latest_audio or audio_file in st.session_state['loaded_audio']:
+                        st.audio(audio_file, format="audio/mpeg")
+                    else:
+                        st.button(":arrow_forward: Load audio", key=f"audio-{index}-{audio_file}",
+                                  on_click=load_audio, args=(audio_file,))
 
 def render_body():
-    if prompt := st.chat_input("Enter a podcast idea..."):
-        # display user
-        with st.chat_message("user"):
-            st.markdown(prompt)
-        # append user message
+    session_id = st.session_state['current_session_id']
+    active_job = jobs.get_active_job(session_id)
+
+    if 'job_error' in st.session_state:
+        st.error(st.session_state.pop('job_error'))
+
+    # One generation per session at a time; a refresh re-attaches to the job that is still running
+    if prompt := st.chat_input("Enter a podcast idea...", disabled=active_job is not None):
         user_entry = {"role": "user", "content": prompt}
-        st.session_state['messages'].append(user_entry)
-        # update persistent data
-        for sess in session_conversation_data['sessions']:
-            if sess['session_id'] == st.session_state['current_session_id']:
-                sess['messages'].append(user_entry)
-                break
-
-        # assistant response
-        audio_files = []
-        with st.chat_message("assistant"):
-            placeholder = st.empty()
-            cursor_placeholder = st.empty()
-
-            with cursor_placeholder:
-                st_lottie(load_json("assets/lotte-loading.json"), height=60)
-
-            response: RunResponse = team.run(
-                prompt,
-                stream=False,
-                session_id=st.session_state['current_session_id']
+
+        def run_prompt(job):
+            # The team is only built once the job is accepted, so a refused submit costs nothing.
+            team_start_time = time.perf_counter()
+            team = get_team(session_id)
+            logger.info("Team ready in %.1fms", (time.perf_counter() - team_start_time) * 1000)
+
+            # History comes from the store, which has every finished answer even when the UI list is behind.
+            # The prompt is stored by the job itself, so it always lands before the answer.
+            history = session_store.load_messages(session_id)
+            session_store.append_message(session_id, user_entry)
+            return pipeline.complete_turn(
+                team, prompt, session_id, history, on_text=job.update, on_audio=job.set_partial_audio
             )
-            full_text = ""
-            # for chunk in response:
-            # if hasattr(response, 'content') and chunk.content:
-            if response.content:
-                full_text += response.content
-                placeholder.markdown(strip_think_sections(full_text))
-            if response.audio:
-                print("jfdsa;teiowafdjsakfhuaufosafjdsa--------- Audio len: ", len(response.audio))
-                for i in range(len(response.audio)):
-                    write_audio_to_file(
-                        response.audio[i].base64_audio,
-                        filename=f"temp/{st.session_state['current_session_id']}_{i}.mp3"
-                    )
-                    st.audio(f"temp/{st.session_state['current_session_id']}_{i}.mp3", format="audio/mpeg")
-                    audio_files.append(f"temp/{st.session_state['current_session_id']}_{i}.mp3")
-                    
-
-            cursor_placeholder.empty()
-
-        assistant_entry_1 = {"role": "assistant", "content": strip_think_sections(full_text)}
-        assistant_entry_2 = {"role": "assistant", "content": audio_files}
-        st.session_state['messages'].append(assistant_entry_1)
-        st.session_state['messages'].append(assistant_entry_2)
-        for sess in session_conversation_data['sessions']:
-            if sess['session_id'] == st.session_state['current_session_id']:
-                sess['messages'].append(assistant_entry_1)
-                sess['messages'].append(assistant_entry_2)
-                break
-
-        current_session = next(s for s in session_conversation_data['sessions']
-                       if s['session_id'] == st.session_state['current_session_id'])
-
-        if current_session.get("summary", "New Session") == "New Session":
-            summary_line = strip_think_sections(full_text).splitlines()[0]
-            
-            summary_text = ""
-            resp: Iterator[RunResponse] = agents.get_summary_agent(session_id="fd").run(summary_line, stream=True)
-            for chunk in resp:
-                if hasattr(chunk, 'content') and chunk.content:
-                    summary_text += chunk.content
-        
-            current_session["summary"] = summary_text
-            st.session_state['summary'] = summary_text
-
-        # persist conversations
-        with open(conversations_file, "w") as f:
-            json.dump(session_conversation_data, f, indent=4)
+
+        job_id = jobs.submit(session_id, prompt, run_prompt)
+        if job_id is None:
+            # Another tab (or an earlier submit) of this session is still generating
+            st.warning("A response is still being generated for this session.")
+            active_job = jobs.get_active_job(session_id)
+        else:
+            # display user
+            with st.chat_message("user"):
+                st.markdown(prompt)
+            st.session_state['messages'].append(user_entry)
+            active_job = jobs.get_job(job_id)
+
+    if active_job is not None:
+        st.session_state['watched_job'] = active_job['job_id']
+        render_job(active_job['job_id'])
+
+def reconcile_watched_job() -> bool:
+    # Takes in the result of the job this browser session watches once it has finished. Runs on every
+    # full rerun too, since a click can rerun the page after the job ends but before the fragment ticks.
+    job_id = st.session_state.get('watched_job')
+    if job_id is None:
+        return False
+    job = jobs.get_job(job_id)
+    if job is not None and job['status'] not in (jobs.DONE, jobs.FAILED):
+        return False
+    del st.session_state['watched_job']
+    if job is not None and job['session_id'] == st.session_state['current_session_id']:
+        if job['status'] == jobs.FAILED:
+            st.session_state['job_error'] = f"Generation failed: {job['error']}"
+        st.session_state['messages'] = session_store.load_messages(job['session_id'])
+        st.session_state['summary'] = session_store.get_session(job['session_id'])['summary']
+    return True
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_job(job_id: str):
+    job = jobs.get_job(job_id)
+    if job['status'] in (jobs.DONE, jobs.FAILED):
+        st.session_state['watched_job'] = job_id
+        reconcile_watched_job()
+        st.rerun()
+
+    with st.chat_message("assistant"):
+        if job['partial_output'].strip():
+            st.markdown(job['partial_output'])
+        else:
+            st_lottie(load_json("assets/lotte-loading.json"), height=60)
+        # Start of the episode, playable while the rest of it is being synthesized
+        if job['partial_audio'] and os.path.exists(job['partial_audio']):
+            st.audio(job['partial_audio'])
 
 
 def main():
+    reconcile_watched_job()
     render_sidebar()
     restore_session()
     render_body()
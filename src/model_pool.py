@@ -0,0 +1,332 @@
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+
+from agno.models.base import Model
+from agno.models.response import ModelResponse
+
+import tracing
+import rate_limits
+
+# Model pool per agent role: tracks rolling latency and error rate of each provider, sends each
+# model call to the fastest healthy one and fails over to the next on errors. Optionally hedges:
+# if the first provider hasn't answered (or, when streaming, produced its first chunk) within
+# `hedge_after` seconds, the same request is also sent to a backup and whichever answers first wins.
+# A provider that failed too often is skipped for a cooldown and then gets a single probe call; if
+# that succeeds its error window is cleared, otherwise it goes back into cooldown. Every
+# EXPLORE_EVERY calls, a healthy provider that was never measured, or not for STALE_SECONDS, is
+# tried first instead, so a provider that has become faster is found without waiting for a failure.
+
+logger = logging.getLogger(__name__)
+
+WINDOW = 20
+MAX_ERROR_RATE = 0.5
+COOLDOWN_SECONDS = 30.0
+EXPLORE_EVERY = 10
+STALE_SECONDS = 5 * 60
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="model-pool")
+
+@dataclass
+class ProviderStats:
+    # Whole calls and time to the first chunk of streamed calls are kept apart, since they are not comparable.
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=WINDOW))
+    first_chunk_latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=WINDOW))
+    errors: Deque[bool] = field(default_factory=lambda: deque(maxlen=WINDOW))
+    consecutive_errors: int = 0
+    cooldown_until: float = 0.0
+    # When the current probe call of a recovering provider started; 0 while none is running.
+    probe_started: float = 0.0
+    # When the latest successful call finished; 0 if there was none.
+    measured_at: float = 0.0
+
+    def window(self, stream: bool = False) -> Deque[float]:
+        return self.first_chunk_latencies if stream else self.latencies
+
+    def latency(self, stream: bool = False) -> float:
+        # Median of the window.
+        window = self.window(stream)
+        if not window:
+            return 0.0
+        return sorted(window)[len(window) // 2]
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.errors) / len(self.errors) if self.errors else 0.0
+
+    def recovering(self, now: float) -> bool:
+        # Cooled down, but its error window still says it is failing.
+        return now >= self.cooldown_until and self.error_rate > MAX_ERROR_RATE
+
+    def healthy(self, now: float) -> bool:
+        if now < self.cooldown_until:
+            return False
+        if self.error_rate <= MAX_ERROR_RATE:
+            return True
+        # A recovering provider is tried again by one call at a time; a probe that never reported
+        # back stops blocking the next one after a cooldown.
+        return now - self.probe_started >= COOLDOWN_SECONDS
+
+class ModelPool:
+    def __init__(self, role: str, models: Dict[str, Model], pinned: Optional[str] = None,
+                 hedge_with: Optional[str] = None, hedge_after: Optional[float] = None):
+        # pinned: always tried first while healthy (e.g. a local model for cheap roles)
+        self.role = role
+        self.models = models
+        self.pinned = pinned
+        self.hedge_with = hedge_with
+        self.hedge_after = hedge_after
+        self.stats = {name: ProviderStats() for name in models}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def ranked(self, explore: bool = False, stream: bool = False) -> List[str]:
+        # Healthy providers by measured latency; unmeasured ones keep their configured order after
+        # them and the hedge backup comes last. Unhealthy providers are only left as a last resort.
+        # explore is set for the order of an actual call, which may then try a stale provider first.
+        # stream ranks by time to the first chunk instead of whole call time.
+        now = time.time()
+        order = list(self.models)
+        with self._lock:
+            def key(name):
+                stats = self.stats[name]
+                window = stats.window(stream)
+                return (name != self.pinned, name == self.hedge_with, stats.latency(stream) if window else float("inf"), order.index(name))
+            healthy = sorted((n for n, s in self.stats.items() if s.healthy(now)), key=key)
+            unhealthy = sorted((n for n, s in self.stats.items() if not s.healthy(now)), key=lambda n: self.stats[n].cooldown_until)
+            if explore:
+                self.calls += 1
+                if self.calls % EXPLORE_EVERY == 0:
+                    healthy = self._explore(healthy, now)
+        return healthy + unhealthy
+
+    def _explore(self, healthy: List[str], now: float) -> List[str]:
+        # A pinned provider stays first and the hedge backup is only a backup, so neither is explored.
+        if self.pinned in healthy[:1]:
+            return healthy
+        stale = [name for name in healthy[1:]
+                 if name != self.hedge_with and now - self.stats[name].measured_at >= STALE_SECONDS]
+        if not stale:
+            return healthy
+        name = min(stale, key=lambda n: self.stats[n].measured_at)
+        logger.info("Exploring %s for %s", name, self.role)
+        return [name] + [n for n in healthy if n != name]
+
+    def start(self, name: str):
+        # Called before each call to a provider, so only one call probes a recovering provider.
+        now = time.time()
+        with self._lock:
+            stats = self.stats[name]
+            if stats.recovering(now):
+                stats.probe_started = now
+
+    def record(self, name: str, latency: Optional[float], error: bool, stream: bool = False):
+        with self._lock:
+            stats = self.stats[name]
+            probing = stats.probe_started > 0
+            stats.probe_started = 0.0
+            if error:
+                stats.errors.append(True)
+                stats.consecutive_errors += 1
+                if stats.consecutive_errors >= 2 or probing:
+                    stats.cooldown_until = time.time() + COOLDOWN_SECONDS
+            else:
+                if probing:
+                    # The provider is back; the errors from before the cooldown no longer apply.
+                    stats.errors.clear()
+                stats.errors.append(False)
+                stats.consecutive_errors = 0
+                stats.window(stream).append(latency)
+                stats.measured_at = time.time()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {"latency": s.latency(), "first_chunk_latency": s.latency(stream=True),
+                       "error_rate": s.error_rate, "cooldown_until": s.cooldown_until}
+                for name, s in self.stats.items()
+            }
+
+def _close(stream):
+    close = getattr(stream, "close", None)
+    if close is not None:
+        close()
+
+def _discard(future, discard: Callable[[Any], None]):
+    # Failed losers have nothing to release.
+    if future.exception() is not None:
+        return
+    try:
+        discard(future.result())
+    except Exception as e:
+        logger.warning("Could not release a hedged call: %s", e)
+
+@dataclass
+class PooledModel(Model):
+    # An agno Model that forwards each call to a provider chosen by its pool. Raw responses are tagged
+    # with the provider name so they are parsed by the model that produced them.
+    id: str = "model-pool"
+    name: str = "PooledModel"
+    provider: str = "Pool"
+    pool: Optional[ModelPool] = None
+
+    def __post_init__(self):
+        if hasattr(Model, "__post_init__"):
+            super().__post_init__()
+        self.id = f"pool:{self.pool.role}"
+        self._last_provider = threading.local()
+
+    def __deepcopy__(self, memo):
+        # Copies of an agent keep sharing the pool and its provider statistics.
+        return self
+
+    def _provider(self) -> Model:
+        name = getattr(self._last_provider, "name", None) or self.pool.ranked()[0]
+        return self.pool.models[name]
+
+    def _candidates(self, stream: bool = False) -> Tuple[List[str], Optional[str]]:
+        order = self.pool.ranked(explore=True, stream=stream)
+        hedge = self.pool.hedge_with if self.pool.hedge_after is not None and self.pool.hedge_with != order[0] else None
+        return order, hedge
+
+    def _invoke(self, name: str, messages, kwargs):
+        rate_limits.acquire(name)
+        self.pool.start(name)
+        start = time.perf_counter()
+        try:
+            with tracing.span("model.provider", role=self.pool.role, provider=name):
+                response = self.pool.models[name].invoke(messages=messages, **kwargs)
+        except Exception:
+            self.pool.record(name, None, error=True)
+            raise
+        self.pool.record(name, time.perf_counter() - start, error=False)
+        return response
+
+    def _open_stream(self, name: str, messages, kwargs):
+        # Starts the provider's stream and waits for its first chunk, which is what hedging races on.
+        rate_limits.acquire(name)
+        self.pool.start(name)
+        start = time.perf_counter()
+        try:
+            # The span covers the wait for the first chunk, which is when the provider is known.
+            with tracing.span("model.provider", role=self.pool.role, provider=name, stream=True):
+                stream = iter(self.pool.models[name].invoke_stream(messages=messages, **kwargs))
+                first = next(stream, None)
+        except Exception:
+            self.pool.record(name, None, error=True, stream=True)
+            raise
+        self.pool.record(name, time.perf_counter() - start, error=False, stream=True)
+        return first, stream
+
+    def _race(self, call, messages, kwargs, discard: Optional[Callable[[Any], None]] = None,
+              stream: bool = False) -> Tuple[str, Any]:
+        # discard is given the result of a hedged call that lost the race, e.g. to close its stream.
+        order, hedge = self._candidates(stream)
+        # Calls run in a copy of the caller's context so their spans land in the caller's trace.
+        submit = lambda name: _executor.submit(contextvars.copy_context().run, call, name, messages, kwargs)
+        futures = {submit(order[0]): order[0]}
+        if hedge is not None:
+            done, _ = wait(futures, timeout=self.pool.hedge_after)
+            if not done:
+                logger.info("Hedging %s: %s is slow, also asking %s", self.pool.role, order[0], hedge)
+                futures[submit(hedge)] = hedge
+
+        last_error = None
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning("%s call to %s failed: %s", self.pool.role, futures[future], e)
+                last_error = e
+                continue
+            if discard is not None:
+                for other in futures:
+                    if other is not future:
+                        other.add_done_callback(lambda loser: _discard(loser, discard))
+            return futures[future], result
+
+        # Everything raced so far failed; fail over to the remaining providers one at a time.
+        for name in order:
+            if name in futures.values():
+                continue
+            try:
+                return name, call(name, messages, kwargs)
+            except Exception as e:
+                logger.warning("%s call to %s failed: %s", self.pool.role, name, e)
+                last_error = e
+        raise RuntimeError(f"All providers failed for {self.pool.role}") from last_error
+
+    def invoke(self, messages, **kwargs) -> Any:
+        name, response = self._race(self._invoke, messages, kwargs)
+        self._last_provider.name = name
+        return name, response
+
+    def invoke_stream(self, messages, **kwargs) -> Iterator[Any]:
+        name, (first, stream) = self._race(self._open_stream, messages, kwargs, discard=lambda result: _close(result[1]), stream=True)
+        self._last_provider.name = name
+        if first is not None:
+            yield name, first
+        for chunk in stream:
+            yield name, chunk
+
+    async def ainvoke(self, messages, **kwargs) -> Any:
+        # Async callers get failover but no hedging.
+        last_error = None
+        for name in self.pool.ranked(explore=True):
+            rate_limits.acquire(name)
+            self.pool.start(name)
+            start = time.perf_counter()
+            try:
+                response = await self.pool.models[name].ainvoke(messages=messages, **kwargs)
+            except Exception as e:
+                self.pool.record(name, None, error=True)
+                last_error = e
+                continue
+            self.pool.record(name, time.perf_counter() - start, error=False)
+            self._last_provider.name = name
+            return name, response
+        raise last_error
+
+    async def ainvoke_stream(self, messages, **kwargs):
+        # Like ainvoke: failover until a provider produces its first chunk, timed up to that chunk.
+        last_error = None
+        for name in self.pool.ranked(explore=True, stream=True):
+            rate_limits.acquire(name)
+            self.pool.start(name)
+            start = time.perf_counter()
+            stream = self.pool.models[name].ainvoke_stream(messages=messages, **kwargs).__aiter__()
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except Exception as e:
+                self.pool.record(name, None, error=True, stream=True)
+                last_error = e
+                continue
+            latency = time.perf_counter() - start
+            self.pool.record(name, latency, error=False, stream=True)
+            tracing.record_span("model.provider", latency, role=self.pool.role, provider=name, stream=True)
+            self._last_provider.name = name
+            if first is not None:
+                yield name, first
+                async for chunk in stream:
+                    yield name, chunk
+            return
+        raise last_error
+
+    def parse_provider_response(self, response, **kwargs) -> ModelResponse:
+        name, raw = response
+        return self.pool.models[name].parse_provider_response(raw, **kwargs)
+
+    def parse_provider_response_delta(self, response, **kwargs) -> ModelResponse:
+        name, raw = response
+        return self.pool.models[name].parse_provider_response_delta(raw, **kwargs)
+
+    def format_function_call_results(self, *args, **kwargs):
+        # Tool results are formatted the way the provider that asked for them expects.
+        return self._provider().format_function_call_results(*args, **kwargs)
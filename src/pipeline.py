@@ -0,0 +1,258 @@
+import os
+import re
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import session_store
+import artifact_cache
+import audio_stream
+import router
+import research
+import context_budget
+import response_cache
+import tracing
+import titles
+import tts_pipeline
+
+# One chat turn, independent of the UI: route the prompt, build each agent's context, stream the
+# response and store its audio. The Streamlit app runs this in a background job.
+
+logger = logging.getLogger(__name__)
+
+def strip_think_sections(text: str) -> str:
+    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL)
+
+def strip_think_stream(text: str) -> str:
+    # Like strip_think_sections, but for a partially streamed response: an unclosed <think> block
+    # (or a tag that is still arriving, e.g. "<thi") is hidden until the rest of it shows up.
+    text = strip_think_sections(text)
+    open_at = text.find("<think>")
+    if open_at != -1:
+        return text[:open_at]
+    for i in range(len("<think>") - 1, 0, -1):
+        if text.endswith("<think>"[:i]):
+            return text[:-i]
+    return text
+
+# Stream events that carry response text; tool call and reasoning events are skipped. A team run also
+# streams its members' content events, which the team repeats as its own, so only the events of the
+# runner itself are taken.
+CONTENT_EVENTS = {"RunResponse", "RunResponseContent"}
+TEAM_CONTENT_EVENTS = {"TeamRunResponse", "TeamRunResponseContent"}
+
+def is_content_chunk(chunk, team_run: bool = False) -> bool:
+    events = TEAM_CONTENT_EVENTS if team_run else CONTENT_EVENTS
+    default_event = "TeamRunResponse" if team_run else "RunResponse"
+    return isinstance(getattr(chunk, 'content', None), str) and getattr(chunk, 'event', default_event) in events
+
+@dataclass
+class TurnResult:
+    text: str
+    audio_files: List[str] = field(default_factory=list)
+    routed_by: str = "llm"
+    member: Optional[str] = None
+    elapsed: float = 0.0
+    first_token_time: Optional[float] = None
+    prompt_tokens: int = 0
+
+# Tool call events carry the one tool they are about in `tool`.
+TOOL_CALL_EVENTS = {"ToolCallStarted", "TeamToolCallStarted"}
+
+def called_tools(chunk) -> List[str]:
+    tool = getattr(chunk, 'tool', None)
+    if getattr(chunk, 'event', None) not in TOOL_CALL_EVENTS or tool is None:
+        return []
+    return [tool.get("tool_name") if isinstance(tool, dict) else getattr(tool, "tool_name", None)]
+
+def record_model_calls(response):
+    # One span per model call of the run (and of the member runs of a team), from the message metrics.
+    name = getattr(response, "agent_id", None) or getattr(response, "team_id", None)
+    for message in getattr(response, "messages", None) or []:
+        metrics = getattr(message, "metrics", None)
+        if message.role == "assistant" and metrics is not None and getattr(metrics, "time", None):
+            tracing.record_span(
+                "model.call", metrics.time, agent=name,
+                input_tokens=metrics.input_tokens, output_tokens=metrics.output_tokens
+            )
+    for member_response in getattr(response, "member_responses", None) or []:
+        record_model_calls(member_response)
+
+def agents_in_run(team, runner):
+    return [runner] if runner is not team else [team] + list(team.members)
+
+def route_prompt(team, prompt: str, history: List[Dict]):
+    # Clear requests go straight to the member agent; ambiguous ones through the team's LLM router.
+    with tracing.span("route.local") as span:
+        decision = router.route(prompt)
+        span.set(member=decision.member, reason=decision.reason)
+    runner, message = team, prompt
+    if decision.member:
+        member_message = router.build_member_message(decision, prompt, history)
+        member = next((m for m in team.members if m.name == decision.member), None)
+        if member is not None and member_message is not None:
+            runner, message = member, member_message
+    logger.info("Routing '%s' via %s (%s)", decision.member or "team", "local" if runner is not team else "llm", decision.reason)
+    return runner, message, decision
+
+def start_run(team, runner, message: str, decision, prompt: str, session_id: str, history: List[Dict]):
+    # Each agent gets the conversation so far as a context bounded by its own token budget
+    context_tokens = {}
+    with tracing.span("context.build") as span:
+        for agent in agents_in_run(team, runner):
+            context, context_tokens[agent.name] = context_budget.build_context_for(agent.name, history)
+            agent.additional_context = context or None
+        span.set(tokens=context_tokens)
+    logger.info("Context tokens per agent: %s", context_tokens)
+
+    query = research.research_query(prompt, router.find_latest_topics(history)) if decision.member == router.WRITER_AGENT else None
+    if runner is not team and query:
+        # Fetch search results, articles and papers for a new script concurrently before the writer starts
+        with tracing.span("research.prefetch") as span:
+            notes = research.format_context(research.prefetch(query))
+            runner.additional_context = "\n\n".join(filter(None, [runner.additional_context, notes]))
+            span.set(query=query, bytes=len(notes.encode("utf-8")))
+
+    stream = runner.run(
+        message,
+        stream=True,
+        stream_intermediate_steps=True,
+        session_id=session_id
+    )
+    return stream
+
+def run_turn(team, prompt: str, session_id: str, history: List[Dict], on_text: Callable[[str], None] = None,
+             on_audio: Callable[[str], None] = None) -> TurnResult:
+    # history is the conversation before this prompt; on_text receives the visible text as it streams in
+    # and on_audio the path of the first playable audio segment while the episode is still being synthesized.
+    # The partial audio is a chunk artifact no session references, so it is pinned until the turn ends.
+    pin = f"turn:{session_id}"
+
+    def on_segment(path: str):
+        artifact_cache.reference_path(path, pin)
+        if on_audio is not None:
+            on_audio(path)
+
+    token = audio_stream.segment_listener.set(on_segment)
+    try:
+        with tracing.trace("turn.run", session_id=session_id, prompt=prompt):
+            return _run_turn(team, prompt, session_id, history, on_text)
+    finally:
+        audio_stream.segment_listener.reset(token)
+        artifact_cache.release_session(pin)
+
+def _run_turn(team, prompt: str, session_id: str, history: List[Dict], on_text: Callable[[str], None] = None) -> TurnResult:
+    start_time = time.perf_counter()
+    first_token_time = None
+    routing_time = None
+
+    runner, message, decision = route_prompt(team, prompt, history)
+    if runner is not team and decision.member == router.VOICE_AGENT:
+        # The script goes straight to the TTS pipeline; making the model repeat it as a tool argument
+        # would cut long scripts off at the model's output limit.
+        return speech_turn(runner, decision, prompt, session_id, history, start_time, on_text)
+
+    cache_context = None
+    if runner is not team and decision.member in response_cache.CACHED_ROLES:
+        # Topic suggestions and captions are often asked for almost word for word
+        cache_context = response_cache.context_key(decision.member, message, prompt, history)
+        with tracing.span("cache.response", role=decision.member) as span:
+            hit = response_cache.lookup(decision.member, prompt, cache_context)
+            span.set(hit=hit is not None, similarity=hit["similarity"] if hit else None)
+        if hit is not None:
+            return cached_turn(hit, decision, prompt, session_id, start_time, on_text)
+
+    stream = start_run(team, runner, message, decision, prompt, session_id, history)
+    full_text = ""
+    try:
+        with tracing.span("run.stream", runner=runner.name) as stream_span:
+            for chunk in stream:
+                # The team's LLM routing hop ends when it forwards the task to a member
+                if runner is team and routing_time is None and "forward_task_to_member" in called_tools(chunk):
+                    routing_time = time.perf_counter() - start_time
+                    tracing.record_span("route.llm", routing_time)
+                if not is_content_chunk(chunk, team_run=runner is team) or not chunk.content:
+                    continue
+                full_text += chunk.content
+                visible_text = strip_think_stream(full_text)
+                if first_token_time is None and visible_text.strip():
+                    first_token_time = time.perf_counter() - start_time
+                    logger.info("Time to first token: %.2fs", first_token_time)
+                if on_text is not None:
+                    on_text(visible_text)
+            stream_span.set(first_token_time=first_token_time, chars=len(full_text))
+
+        # Audio artifacts are only available on the final run response once the stream is drained
+        response = runner.run_response
+    finally:
+        for agent in agents_in_run(team, runner):
+            agent.additional_context = None
+
+    elapsed = time.perf_counter() - start_time
+    logger.info("Response streamed in %.2fs", elapsed)
+    routed_by = "local" if runner is not team else "llm"
+    router.record_decision(decision, prompt, session_id, routed_by=routed_by, elapsed=elapsed)
+    record_model_calls(response)
+
+    result = TurnResult(
+        text=strip_think_sections(full_text),
+        routed_by=routed_by,
+        member=decision.member if routed_by == "local" else None,
+        elapsed=elapsed,
+        first_token_time=first_token_time,
+        prompt_tokens=context_budget.prompt_tokens(response),
+    )
+    logger.info("Prompt tokens this turn: %d", result.prompt_tokens)
+
+    if response is not None and response.audio:
+        for audio in response.audio:
+            # Stored under its content hash, so earlier turns in the session keep their audio. Audio
+            # from the TTS pipeline is already a file in the cache and only needs pinning to the session.
+            if audio.url and os.path.exists(audio.url):
+                result.audio_files.append(artifact_cache.reference_path(audio.url, session_id))
+            elif audio.base64_audio:
+                result.audio_files.append(artifact_cache.store_audio(audio.base64_audio, session_id))
+
+    if cache_context is not None:
+        response_cache.store(decision.member, prompt, result.text, cache_context)
+    return result
+
+def speech_turn(runner, decision, prompt: str, session_id: str, history: List[Dict], start_time: float,
+                on_text: Callable[[str], None] = None) -> TurnResult:
+    script = router.find_latest_script(history)
+    audio_tools = next(t for t in runner.tools if isinstance(t, tts_pipeline.PodcastAudioTools))
+    with tracing.span("tts.direct", chars=len(script)) as span:
+        path = audio_tools.synthesize(script)
+        span.set(generated=path is not None)
+    audio_files = [artifact_cache.reference_path(path, session_id)] if path else []
+    text = "Here is the audio for the latest podcast script." if path else "The script has no spoken content to convert."
+    if on_text is not None:
+        on_text(text)
+    elapsed = time.perf_counter() - start_time
+    router.record_decision(decision, prompt, session_id, routed_by="local", elapsed=elapsed)
+    return TurnResult(text=text, audio_files=audio_files, routed_by="local", member=decision.member, elapsed=elapsed, first_token_time=elapsed)
+
+def cached_turn(hit: Dict, decision, prompt: str, session_id: str, start_time: float, on_text: Callable[[str], None] = None) -> TurnResult:
+    text = hit["response"] + response_cache.CACHED_MARKER
+    if on_text is not None:
+        on_text(text)
+    elapsed = time.perf_counter() - start_time
+    logger.info("Answered from the response cache in %.2fs (similarity %.2f)", elapsed, hit["similarity"])
+    router.record_decision(decision, prompt, session_id, routed_by="cache", elapsed=elapsed)
+    return TurnResult(text=text, routed_by="cache", member=decision.member, elapsed=elapsed, first_token_time=elapsed)
+
+def complete_turn(team, prompt: str, session_id: str, history: List[Dict], on_text: Callable[[str], None] = None,
+                  on_audio: Callable[[str], None] = None) -> Dict:
+    # run_turn plus persistence: the assistant messages are stored and a new session is queued for a title.
+    with tracing.trace("turn", session_id=session_id, prompt=prompt):
+        result = run_turn(team, prompt, session_id, history, on_text=on_text, on_audio=on_audio)
+
+        with tracing.span("storage.append_message", bytes=len(result.text.encode("utf-8"))):
+            session_store.append_message(session_id, {"role": "assistant", "content": result.text})
+            session_store.append_message(session_id, {"role": "assistant", "content": result.audio_files})
+
+        # A new session is titled on a background worker, so the turn finishes without waiting for it.
+        titles.schedule(session_id, result.text)
+
+    return {"text": result.text, "audio_files": result.audio_files, "elapsed": result.elapsed}
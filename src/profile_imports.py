@@ -0,0 +1,88 @@
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, List
+
+# Import-time profile: imports each module in a fresh interpreter with `python -X importtime` and
+# reports the total time plus the slowest modules it pulled in. Also checks that the model and tool
+# SDKs, which are meant to be imported on first use only, stay out of the startup path. Exits non-zero
+# on a budget overrun or an eager import, so it can gate startup regressions.
+#
+#   python src/profile_imports.py
+#   python src/profile_imports.py agents pipeline --budget-ms 1500 --top 15 --out import_profile.json
+
+# What main.py imports before the first prompt.
+DEFAULT_MODULES = ["agents", "session_store", "pipeline", "jobs", "tracing", "titles", "response_cache"]
+
+# Built on first use through agents.registry; none of these should be imported by the modules above.
+DEFERRED_MODULES = [
+    "agno.models.ollama", "agno.models.google", "agno.models.groq",
+    "agno.tools.googlesearch", "agno.tools.arxiv", "agno.tools.newspaper4k", "agno.tools.reasoning",
+    "cartesia", "lancedb", "pandas", "numpy",
+]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+def profile_module(module: str) -> Dict:
+    # Cumulative import time in microseconds per imported module, as reported by -X importtime.
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    check = f"import {module}; import sys, json; print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=src_dir, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        return {"module": module, "error": process.stderr.strip().splitlines()[-1]}
+
+    cumulative = {}
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return {
+        "module": module,
+        "total_ms": cumulative.get(module, 0) / 1000,
+        "modules": cumulative,
+        "eager": json.loads(process.stdout.strip().splitlines()[-1]),
+    }
+
+def report(modules: List[str], top: int = 10) -> List[Dict]:
+    results = []
+    for module in modules:
+        profile = profile_module(module)
+        if "error" not in profile:
+            slowest = sorted(profile.pop("modules").items(), key=lambda item: item[1], reverse=True)
+            profile["slowest"] = [{"module": name, "ms": us / 1000} for name, us in slowest if name != module][:top]
+        results.append(profile)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the import time of the app's modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=10, help="slowest imported modules to list per module")
+    parser.add_argument("--budget-ms", type=float, help="fail if importing any module takes longer")
+    parser.add_argument("--out", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    results = report(args.modules, args.top)
+    failed = False
+    for result in results:
+        if "error" in result:
+            print(f"{result['module']}: failed to import ({result['error']})")
+            failed = True
+            continue
+        over_budget = args.budget_ms is not None and result["total_ms"] > args.budget_ms
+        print(f"{result['module']}: {result['total_ms']:.1f} ms{'  OVER BUDGET' if over_budget else ''}")
+        for entry in result["slowest"]:
+            print(f"    {entry['ms']:9.1f} ms  {entry['module']}")
+        if result["eager"]:
+            print(f"    imported eagerly: {', '.join(result['eager'])}")
+        failed = failed or over_budget or bool(result["eager"])
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=4)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,38 @@
+import time
+import threading
+from typing import Dict, List
+
+# Client-side rate limits per provider ("gemini", "groq", "cartesia", ...). Limits are taken where the
+# provider is actually called (model_pool.PooledModel and the Cartesia TTS backend), so a turn that
+# makes several model calls, fails over to another provider or is answered from a cache is counted
+# as what it really sent. Providers without a configured limit are not throttled.
+
+class RateLimiter:
+    # Sliding-window limiter: at most `calls` acquisitions in any `period` seconds.
+    def __init__(self, calls: int, period: float):
+        self.calls = calls
+        self.period = period
+        self._times: List[float] = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._times = [t for t in self._times if now - t < self.period]
+                if len(self._times) < self.calls:
+                    self._times.append(now)
+                    return
+                wait = self.period - (now - self._times[0])
+            time.sleep(wait)
+
+limiters: Dict[str, RateLimiter] = {}
+
+def configure(new_limiters: Dict[str, RateLimiter]):
+    limiters.clear()
+    limiters.update(new_limiters)
+
+def acquire(provider: str):
+    limiter = limiters.get(provider)
+    if limiter is not None:
+        limiter.acquire()
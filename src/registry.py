@@ -0,0 +1,54 @@
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+import tracing
+
+# Lazily built shared objects (models, toolkits, storage): each is created by its factory the first
+# time it is asked for, so a provider SDK or a tool's dependencies are only imported once an agent
+# actually needs them instead of on every cold start.
+
+class Registry:
+    def __init__(self, factories: Dict[str, Callable[[], Any]]):
+        self.factories = dict(factories)
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        # Reentrant, since a factory may ask for another entry (e.g. memory needs the storage).
+        with self._lock:
+            if name not in self._instances:
+                with tracing.span("registry.build", entry=name):
+                    self._instances[name] = self.factories[name]()
+            return self._instances[name]
+
+    def set(self, name: str, instance: Any):
+        # Replaces an entry, e.g. with a stand-in for benchmarks.
+        with self._lock:
+            self._instances[name] = instance
+
+    def built(self) -> List[str]:
+        return list(self._instances)
+
+    def view(self, names: Iterable[str]) -> "RegistryView":
+        return RegistryView(self, list(names))
+
+class RegistryView(Mapping):
+    # A read-only mapping over some of the entries that builds each one on first access.
+    def __init__(self, registry: Registry, names: List[str]):
+        self.registry = registry
+        self.names = names
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.names:
+            raise KeyError(name)
+        return self.registry.get(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
@@ -0,0 +1,142 @@
+import re
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import tool_cache
+
+# Research prefetch for the Content Writer Agent: the web search and the arXiv search run at the
+# same time, then the top articles are downloaded concurrently, and everything is handed to the
+# writer in one block of context instead of one tool round-trip at a time.
+
+logger = logging.getLogger(__name__)
+
+MAX_ARTICLES = 3
+MAX_PAPERS = 3
+CALL_TIMEOUT = 10.0
+MAX_ARTICLE_CHARS = 4000
+MAX_WORKERS = 8
+
+@dataclass
+class ResearchResults:
+    query: str
+    search_results: List[Dict] = field(default_factory=list)
+    articles: List[Dict] = field(default_factory=list)
+    papers: List[Dict] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+# Fetchers ----------------------------------------------------------------------------------------------------------
+
+@tool_cache.cached("search_web")
+def search_web(query: str, max_results: int) -> List[Dict]:
+    from googlesearch import search
+
+    return [
+        {"title": r.title, "url": r.url, "description": r.description}
+        for r in search(query, num_results=max_results, lang="en", advanced=True)
+    ]
+
+@tool_cache.cached("fetch_article")
+def fetch_article(url: str) -> Dict:
+    from newspaper import Article
+
+    article = Article(url)
+    article.download()
+    article.parse()
+    return {"url": url, "title": article.title, "text": article.text[:MAX_ARTICLE_CHARS]}
+
+@tool_cache.cached("search_papers")
+def search_papers(query: str, max_results: int) -> List[Dict]:
+    import arxiv
+
+    search = arxiv.Search(query=query, max_results=max_results, sort_by=arxiv.SortCriterion.Relevance)
+    return [
+        {"title": r.title, "url": r.entry_id, "summary": r.summary}
+        for r in arxiv.Client().results(search)
+    ]
+
+# Prefetch ----------------------------------------------------------------------------------------------------------
+
+def prefetch(query: str, max_articles: int = MAX_ARTICLES, max_papers: int = MAX_PAPERS, timeout: float = CALL_TIMEOUT,
+             search_fn: Callable = None, article_fn: Callable = None, papers_fn: Callable = None) -> ResearchResults:
+    # The fetchers can be swapped out (e.g. for local HTTP stand-ins); a fetcher that fails or misses
+    # the deadline is recorded in errors and simply left out of the context. timeout bounds the whole
+    # prefetch, so a slow search leaves less time for the articles rather than adding to it.
+    search_fn = search_fn or search_web
+    article_fn = article_fn or fetch_article
+    papers_fn = papers_fn or search_papers
+    results = ResearchResults(query=query)
+
+    deadline = time.monotonic() + timeout
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    try:
+        search_future = executor.submit(search_fn, query, max_articles)
+        papers_future = executor.submit(papers_fn, query, max_papers)
+
+        results.search_results = _result(search_future, timeout, "web search", results) or []
+        article_futures = [executor.submit(article_fn, r["url"]) for r in results.search_results[:max_articles]]
+
+        # Articles started while the arXiv search was still running; both share the same deadline.
+        wait(article_futures + [papers_future], timeout=max(0.0, deadline - time.monotonic()))
+        results.papers = _result(papers_future, 0, "arxiv search", results) or []
+        for search_result, future in zip(results.search_results, article_futures):
+            article = _result(future, 0, f"article {search_result['url']}", results)
+            if article and article.get("text"):
+                results.articles.append(article)
+    finally:
+        # Do not wait for fetchers that timed out.
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+def _result(future, timeout: float, name: str, results: ResearchResults):
+    try:
+        return future.result(timeout=timeout)
+    except Exception as e:
+        message = f"{name} failed: {type(e).__name__} {e}".strip()
+        logger.warning(message)
+        results.errors.append(message)
+        return None
+
+def format_context(results: ResearchResults) -> str:
+    sections = [f"Research notes for: {results.query}"]
+    if results.search_results:
+        sections.append("## Search results\n" + "\n".join(
+            f"- [{r['title']}]({r['url']}): {r.get('description', '')}" for r in results.search_results
+        ))
+    for article in results.articles:
+        sections.append(f"## Article: {article['title']}\nSource: {article['url']}\n{article['text']}")
+    for paper in results.papers:
+        sections.append(f"## arXiv: {paper['title']}\nSource: {paper['url']}\n{paper['summary']}")
+    return "\n\n".join(sections)
+
+# Query -------------------------------------------------------------------------------------------------------------
+
+ORDINALS = {"first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6, "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10}
+
+NEW_SCRIPT = re.compile(r"\b(write|draft|create|generate|give me)\b.*\bscript\b", re.IGNORECASE)
+# Edits of the last script go to the writer too, but there is nothing new to research for them.
+EDIT = re.compile(r"\b(re-?write|rework|revise|edit|shorten|shorter|longer|expand|tone|funnier|change|improve|tweak|simplify)\b",
+                  re.IGNORECASE)
+SUBJECT = re.compile(r"\b(?:about|on|regarding|covering)\s+(.+)", re.IGNORECASE)
+
+def research_query(prompt: str, topics: Optional[str] = None) -> Optional[str]:
+    # What to research for a request for a new script: the title of the referenced topic ("write a script
+    # for the 3rd topic") or the subject named in the prompt. None when the prompt is not such a request
+    # or its topic can't be resolved, since searching for the prompt itself finds nothing useful.
+    if not NEW_SCRIPT.search(prompt) or EDIT.search(prompt):
+        return None
+    match = re.search(r"\b(\d+)(?:st|nd|rd|th)? topic\b|\btopic (?:no\.? ?|#)?(\d+)\b|\b(" + "|".join(ORDINALS) + r") topic\b",
+                      prompt, re.IGNORECASE)
+    if match:
+        if not topics:
+            return None
+        digits = match.group(1) or match.group(2)
+        number = int(digits) if digits else ORDINALS[match.group(3).lower()]
+        title = re.search(rf"Topic\s+{number}\s*[:.\-]\s*(.+)", topics, re.IGNORECASE)
+        return title.group(1).strip(" *#") if title else None
+    subject = SUBJECT.search(prompt)
+    if subject is None:
+        return None
+    return subject.group(1).strip(" .!?\"'") or None
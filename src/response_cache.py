@@ -0,0 +1,282 @@
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import router
+
+# Semantic response cache for the Topic Strategist and Caption Writer: many users ask them nearly the
+# same thing ("Suggest 5 podcast topics about tech trends"), so answers are indexed by the embedding
+# of the prompt in LanceDB and a similar enough prompt for the same role, with the same context and
+# within the freshness window, is answered from the cache instead of another LLM and search round trip.
+#
+#   python src/response_cache.py           hit rates and entries per role
+#   python src/response_cache.py --evict   drop expired and least recently used entries
+#
+# Prompts are embedded with the local Ollama embedding model; PODCAST_EMBEDDER=stub switches to a
+# hashed bag of words that needs no model, for offline runs and tests.
+
+logger = logging.getLogger(__name__)
+
+cache_dir = "temp/response_cache.lancedb"
+TABLE_NAME = "responses"
+
+CACHED_ROLES = {router.TOPIC_AGENT, router.CAPTION_AGENT}
+# Cosine similarity a prompt needs to reuse a cached answer.
+SIMILARITY_THRESHOLD = float(os.getenv("PODCAST_RESPONSE_CACHE_SIMILARITY", 0.9))
+# Seconds a cached answer stays fresh; topic suggestions follow trends, so this is short by default.
+FRESHNESS_SECONDS = float(os.getenv("PODCAST_RESPONSE_CACHE_TTL", 24 * 60 * 60))
+MAX_ENTRIES = int(os.getenv("PODCAST_RESPONSE_CACHE_ENTRIES", 1000))
+ENABLED = os.getenv("PODCAST_RESPONSE_CACHE", "1") == "1"
+
+# Appended to answers served from the cache so users can tell them apart.
+CACHED_MARKER = "\n\n_⚡ cached answer_"
+
+_lock = threading.Lock()
+_tables = {}
+_metrics_lock = threading.Lock()
+_metrics = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+# Embedders ---------------------------------------------------------------------------------------------------------
+
+STOPWORDS = {
+    "a", "an", "the", "about", "on", "for", "of", "in", "to", "some", "me", "please", "can", "you",
+    "could", "would", "give", "i", "want", "need", "and", "with", "related", "regarding", "around",
+}
+
+def content_words(text: str) -> List[str]:
+    return [w for w in re.findall(r"\w+", text.lower()) if w not in STOPWORDS]
+
+class HashEmbedder:
+    # Offline stand-in for an embedding model: hashed bag of words and word pairs (stop words dropped),
+    # L2 normalized. It cannot tell a narrower prompt from a broader one ("tech trends in healthcare"
+    # is close to "tech trends"), so with it a cached answer is only reused when the content words match.
+    exact_words = True
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+        self.id = f"hash-{dimensions}"
+
+    def get_embedding(self, text: str) -> List[float]:
+        words = content_words(text)
+        vector = [0.0] * self.dimensions
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+class OllamaEmbedder:
+    exact_words = False
+
+    def __init__(self, model: str = "nomic-embed-text", dimensions: int = 768):
+        from agno.embedder.ollama import OllamaEmbedder as AgnoOllamaEmbedder
+
+        # agno assumes 4096 dimensions and returns [] for any other size, so the model's size is passed.
+        self.embedder = AgnoOllamaEmbedder(id=model, dimensions=dimensions)
+        self.dimensions = dimensions
+        self.id = f"ollama-{model}"
+
+    def get_embedding(self, text: str) -> List[float]:
+        return self.embedder.get_embedding(text)
+
+def get_default_embedder():
+    if os.getenv("PODCAST_EMBEDDER", "ollama") == "stub":
+        return HashEmbedder()
+    return OllamaEmbedder()
+
+embedder = None
+
+def get_embedder():
+    global embedder
+    if embedder is None:
+        embedder = get_default_embedder()
+    return embedder
+
+def _embed(text: str) -> List[float]:
+    current = get_embedder()
+    vector = current.get_embedding(re.sub(r"\s+", " ", text).strip())
+    # agno's embedders log and return [] when the model is unreachable instead of raising.
+    if len(vector) != current.dimensions:
+        raise ValueError(f"{current.id} returned {len(vector)} dimensions instead of {current.dimensions}")
+    return vector
+
+# Storage -----------------------------------------------------------------------------------------------------------
+
+def _table(dimensions: int, create: bool = False):
+    # One table per cache directory and embedder; switching embedders starts from an empty cache.
+    name = f"{TABLE_NAME}_{get_embedder().id}".replace("-", "_")
+    table = _tables.get((cache_dir, name))
+    if table is not None:
+        return table
+
+    import lancedb
+    import pyarrow as pa
+
+    db = lancedb.connect(cache_dir)
+    if name in db.table_names():
+        table = db.open_table(name)
+    elif create:
+        schema = pa.schema([
+            pa.field("id", pa.string()),
+            pa.field("vector", pa.list_(pa.float32(), dimensions)),
+            pa.field("role", pa.string()),
+            pa.field("context_key", pa.string()),
+            pa.field("numbers", pa.string()),
+            pa.field("prompt", pa.string()),
+            pa.field("response", pa.string()),
+            pa.field("created_at", pa.float64()),
+            pa.field("last_used", pa.float64()),
+            pa.field("hits", pa.int64()),
+        ])
+        table = db.create_table(name, schema=schema)
+    else:
+        return None
+    _tables[(cache_dir, name)] = table
+    return table
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def _numbers(prompt: str) -> str:
+    # "5 topics" and "10 topics" embed almost the same but are different requests.
+    return " ".join(re.findall(r"\d+", prompt))
+
+def context_key(role: str, message: str, prompt: str, history: List[Dict]) -> str:
+    # What the answer depends on besides the prompt: context added to the member message (e.g. earlier
+    # topics) and, for captions, the script they are written for.
+    parts = [message if message != prompt else ""]
+    if role == router.CAPTION_AGENT:
+        parts.append(router.find_latest_script(history) or "")
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+def _record(role: str, hit: bool):
+    with _metrics_lock:
+        _metrics[role]["hits" if hit else "misses"] += 1
+
+def get_metrics() -> Dict[str, Dict[str, float]]:
+    with _metrics_lock:
+        metrics = {role: dict(counts) for role, counts in _metrics.items()}
+    for counts in metrics.values():
+        total = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = counts["hits"] / total if total else 0.0
+    return metrics
+
+def _same_request(prompt: str, cached_prompt: str) -> bool:
+    if not get_embedder().exact_words:
+        return True
+    return set(content_words(prompt)) == set(content_words(cached_prompt))
+
+def _search(role: str, prompt: str, context: str, vector: List[float]) -> Optional[Dict]:
+    with _lock:
+        table = _table(len(vector))
+        if table is None:
+            return None
+        where = " AND ".join([
+            f"role = {_quote(role)}",
+            f"context_key = {_quote(context)}",
+            f"numbers = {_quote(_numbers(prompt))}",
+            f"created_at >= {time.time() - FRESHNESS_SECONDS}",
+        ])
+        rows = table.search(vector).metric("cosine").where(where, prefilter=True).limit(1).to_list()
+        if not rows or 1.0 - rows[0]["_distance"] < SIMILARITY_THRESHOLD or not _same_request(prompt, rows[0]["prompt"]):
+            return None
+        match = rows[0]
+        table.update(where=f"id = {_quote(match['id'])}", values={"last_used": time.time(), "hits": match["hits"] + 1})
+        return match
+
+def lookup(role: str, prompt: str, context: str = "") -> Optional[Dict]:
+    # The closest fresh answer for the same role and context, if it is similar enough.
+    if not ENABLED or role not in CACHED_ROLES:
+        return None
+    try:
+        vector = _embed(prompt)
+    except Exception as e:
+        # Without the embedding model the cache is skipped rather than failing the turn.
+        logger.warning("Response cache lookup skipped: %s", e)
+        return None
+    try:
+        match = _search(role, prompt, context, vector)
+    except Exception as e:
+        # A broken or mismatched table is treated as a miss as well.
+        logger.warning("Response cache lookup failed: %s", e)
+        match = None
+    _record(role, match is not None)
+    if match is None:
+        return None
+    return {"prompt": match["prompt"], "response": match["response"], "similarity": 1.0 - match["_distance"]}
+
+def store(role: str, prompt: str, response: str, context: str = ""):
+    if not ENABLED or role not in CACHED_ROLES or not response.strip():
+        return
+    try:
+        vector = _embed(prompt)
+    except Exception as e:
+        logger.warning("Response not cached: %s", e)
+        return
+    now = time.time()
+    try:
+        with _lock:
+            _table(len(vector), create=True).add([{
+                "id": uuid.uuid4().hex,
+                "vector": vector,
+                "role": role,
+                "context_key": context,
+                "numbers": _numbers(prompt),
+                "prompt": prompt,
+                "response": response,
+                "created_at": now,
+                "last_used": now,
+                "hits": 0,
+            }])
+        evict()
+    except Exception as e:
+        # Caching is best effort: the answer has already been given and must not be lost over it.
+        logger.warning("Response not cached: %s", e)
+
+def evict(max_entries: int = None, max_age: float = None) -> int:
+    # Drops answers older than max_age, then the least recently used ones above max_entries.
+    max_entries = MAX_ENTRIES if max_entries is None else max_entries
+    max_age = FRESHNESS_SECONDS if max_age is None else max_age
+    with _lock:
+        table = _table(0)
+        if table is None:
+            return 0
+        before = table.count_rows()
+        table.delete(f"created_at < {time.time() - max_age}")
+        count = table.count_rows()
+        if count > max_entries:
+            rows = table.to_arrow().select(["id", "last_used"]).to_pylist()
+            stale = sorted(rows, key=lambda row: row["last_used"])[:count - max_entries]
+            table.delete(f"id IN ({', '.join(_quote(row['id']) for row in stale)})")
+        return before - table.count_rows()
+
+def stats() -> Dict[str, Dict]:
+    # Entries and recorded hits per role in the cache, for the command line report.
+    with _lock:
+        table = _table(0)
+        rows = table.to_arrow().select(["role", "hits"]).to_pylist() if table is not None else []
+    summary = defaultdict(lambda: {"entries": 0, "hits": 0})
+    for row in rows:
+        summary[row["role"]]["entries"] += 1
+        summary[row["role"]]["hits"] += row["hits"]
+    return dict(summary)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report on or evict the semantic response cache.")
+    parser.add_argument("--evict", action="store_true", help="drop expired and least recently used entries")
+    parser.add_argument("--max-entries", type=int, default=MAX_ENTRIES)
+    parser.add_argument("--max-age", type=float, default=FRESHNESS_SECONDS, help="seconds")
+    args = parser.parse_args()
+
+    if args.evict:
+        print(json.dumps({"evicted": evict(args.max_entries, args.max_age)}, indent=4))
+    print(json.dumps(stats(), indent=4))
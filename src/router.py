@@ -0,0 +1,158 @@
+import os
+import re
+import json
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+# Local pre-router for the team: clear topic / script / caption / audio requests are sent straight
+# to the member agent, skipping the LLM routing hop. Anything ambiguous returns no member and
+# goes through the team's own router as before.
+
+TOPIC_AGENT = "Topic Strategist Agent"
+WRITER_AGENT = "Content Writer Agent"
+CAPTION_AGENT = "Caption Writer Agent"
+VOICE_AGENT = "Text to Speech agent"
+
+routing_log_file = "temp/routing_log.jsonl"
+
+# Strong phrases decide on their own, keywords only add evidence for the classifier.
+RULES: Dict[str, List[str]] = {
+    TOPIC_AGENT: [
+        r"\b(suggest|recommend|give me|list|brainstorm|ideas? for)\b.*\btopics?\b",
+        r"\btopic (ideas|suggestions)\b",
+        r"\bwhat should i (make|do) a podcast (about|on)\b",
+    ],
+    WRITER_AGENT: [
+        r"\b(write|draft|create|generate|give me)\b.*\bscript\b",
+        r"\bscript (for|about|on)\b",
+    ],
+    CAPTION_AGENT: [
+        r"\b(write|draft|create|generate|give me|suggest)\b.*\bcaptions?\b",
+        r"\bcaptions? (for|about)\b",
+        r"\b(instagram|twitter|youtube|tweet|social media) (post|caption)\b",
+    ],
+    VOICE_AGENT: [
+        # The verb has to act on the script ("turn it into audio", "generate the mp3"), so prompts like
+        # "make a podcast about voice assistants" are left to the classifier.
+        r"\b(convert|turn|make) (it|(this|that|the)( podcast)?( script| episode)?)( \w+)? (in)?to (an? )?(podcast )?(audio|speech|voice|mp3)\b",
+        r"\b(text to speech|tts|read (it|this|the script) (out|aloud))\b",
+        r"\b(generate|create|make) (the |an? )?(audio|voice ?over|mp3)\b",
+    ],
+}
+
+KEYWORDS: Dict[str, Dict[str, float]] = {
+    # "podcast" hints at a new episode, so a prompt like "a podcast about audio engineering" is not
+    # taken for a text to speech request just because its subject is audio.
+    TOPIC_AGENT: {"topic": 1.0, "topics": 1.5, "ideas": 1.0, "trending": 1.0, "niche": 1.0, "suggest": 0.5, "podcast": 0.5},
+    WRITER_AGENT: {"script": 2.0, "episode": 0.5, "write": 0.5, "outline": 1.0, "chapters": 1.0, "podcast": 0.5},
+    CAPTION_AGENT: {"caption": 2.0, "captions": 2.0, "hashtags": 1.5, "instagram": 1.0, "tweet": 1.0, "post": 0.5},
+    VOICE_AGENT: {"audio": 2.0, "speech": 1.5, "voice": 1.0, "mp3": 2.0, "listen": 1.0, "narrate": 1.5},
+}
+
+# The classifier only decides when the best class is this confident and clearly ahead of the next one.
+MIN_CONFIDENCE = 0.7
+MIN_SCORE = 1.5
+
+NUMBERED_TOPIC = re.compile(r"\b(\d+(st|nd|rd|th)?|first|second|third|fourth|fifth|last) topic\b|\btopic (no\.? ?|#)?\d+\b", re.IGNORECASE)
+
+@dataclass
+class RouteDecision:
+    member: Optional[str]
+    confidence: float
+    reason: str
+    references_topic: bool = False
+    scores: Dict[str, float] = field(default_factory=dict)
+    elapsed_ms: float = 0.0
+
+def classify(prompt: str) -> Dict[str, float]:
+    words = re.findall(r"[a-z0-9]+", prompt.lower())
+    return {member: sum(weights.get(word, 0.0) for word in words) for member, weights in KEYWORDS.items()}
+
+def route(prompt: str) -> RouteDecision:
+    start = time.perf_counter()
+    text = prompt.lower()
+    references_topic = bool(NUMBERED_TOPIC.search(prompt))
+
+    matched = [member for member, patterns in RULES.items() if any(re.search(p, text) for p in patterns)]
+    scores = classify(prompt)
+
+    if len(matched) == 1:
+        decision = RouteDecision(matched[0], 1.0, "rule", references_topic, scores)
+    elif len(matched) > 1:
+        decision = RouteDecision(None, 0.0, "conflicting rules: " + ", ".join(matched), references_topic, scores)
+    else:
+        total = sum(scores.values())
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        best, best_score = ranked[0]
+        confidence = best_score / total if total else 0.0
+        if best_score >= MIN_SCORE and confidence >= MIN_CONFIDENCE:
+            decision = RouteDecision(best, confidence, "classifier", references_topic, scores)
+        else:
+            decision = RouteDecision(None, confidence, "ambiguous", references_topic, scores)
+
+    decision.elapsed_ms = (time.perf_counter() - start) * 1000
+    return decision
+
+# History lookups ---------------------------------------------------------------------------------------------------
+
+TOPIC_LIST = re.compile(r"^\s*#*\s*\**\s*Topic\s+1\b", re.IGNORECASE | re.MULTILINE)
+MIN_SCRIPT_CHARS = 1500
+
+def _assistant_texts(messages: List[Dict]) -> List[str]:
+    return [m["content"] for m in reversed(messages) if m["role"] == "assistant" and isinstance(m["content"], str)]
+
+def find_latest_topics(messages: List[Dict]) -> Optional[str]:
+    return next((text for text in _assistant_texts(messages) if TOPIC_LIST.search(text)), None)
+
+def find_latest_script(messages: List[Dict]) -> Optional[str]:
+    return next((text for text in _assistant_texts(messages)
+                 if len(text) >= MIN_SCRIPT_CHARS and not TOPIC_LIST.search(text)), None)
+
+def build_member_message(decision: RouteDecision, prompt: str, messages: List[Dict]) -> Optional[str]:
+    # The team router forwards context from history to the member; do the same here. Returns None when
+    # the context the member needs cannot be found, so the caller falls back to the team.
+    if decision.member == VOICE_AGENT:
+        script = find_latest_script(messages)
+        return f"{prompt}\n\nPodcast script:\n{script}" if script else None
+    if decision.references_topic:
+        topics = find_latest_topics(messages)
+        return f"{prompt}\n\nPreviously suggested topics:\n{topics}" if topics else None
+    return prompt
+
+# Evaluation --------------------------------------------------------------------------------------------------------
+
+def record_decision(decision: RouteDecision, prompt: str, session_id: str, routed_by: str, elapsed: float,
+                    log_file: str = routing_log_file):
+    # routed_by is "local" when the member agent was called directly, "llm" when the team routed and
+    # "cache" when the answer came from the response cache.
+    entry = asdict(decision)
+    entry.update({"time": time.time(), "session_id": session_id, "prompt": prompt, "routed_by": routed_by, "elapsed": elapsed})
+    os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+    with open(log_file, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+def summarize_log(log_file: str = routing_log_file) -> Dict:
+    # Mean turn time for locally routed turns vs LLM routed turns; the difference is the latency saved.
+    elapsed = {"local": [], "llm": []}
+    if os.path.exists(log_file):
+        with open(log_file, "r") as f:
+            for line in f:
+                entry = json.loads(line)
+                elapsed.setdefault(entry["routed_by"], []).append(entry["elapsed"])
+
+    mean = lambda values: sum(values) / len(values) if values else None
+    summary = {
+        "local_turns": len(elapsed["local"]),
+        "llm_turns": len(elapsed["llm"]),
+        "local_mean_elapsed": mean(elapsed["local"]),
+        "llm_mean_elapsed": mean(elapsed["llm"]),
+    }
+    total = summary["local_turns"] + summary["llm_turns"]
+    summary["local_share"] = summary["local_turns"] / total if total else 0.0
+    if summary["local_mean_elapsed"] is not None and summary["llm_mean_elapsed"] is not None:
+        summary["mean_latency_saved"] = summary["llm_mean_elapsed"] - summary["local_mean_elapsed"]
+    return summary
+
+if __name__ == "__main__":
+    print(json.dumps(summarize_log(), indent=4))
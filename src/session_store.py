@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import sqlite3
+from typing import Dict, List, Optional
+
+import sqlite_db
+
+# Session store backed by SQLite: one row per session and one row per message, so
+# adding a turn is a single INSERT instead of rewriting the whole conversations file.
+
+store_db_file = "temp/sessions.db"
+legacy_conversations_file = "temp/conversations.json"
+
+DEFAULT_SUMMARY = "New Session"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES sessions(session_id),
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id);
+CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    applied_at REAL NOT NULL
+);
+"""
+
+def get_connection(db_file: str = store_db_file) -> sqlite3.Connection:
+    # One connection per thread and database file, see sqlite_db.py
+    return sqlite_db.get_connection(db_file, SCHEMA)
+
+def create_session(session_id: str, summary: str = DEFAULT_SUMMARY, db_file: str = store_db_file) -> Dict:
+    now = time.time()
+    conn = get_connection(db_file)
+    with conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO sessions (session_id, summary, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (session_id, summary, now, now)
+        )
+    return {"session_id": session_id, "summary": summary}
+
+def get_session(session_id: str, db_file: str = store_db_file) -> Optional[Dict]:
+    row = get_connection(db_file).execute(
+        "SELECT session_id, summary FROM sessions WHERE session_id = ?", (session_id,)
+    ).fetchone()
+    return dict(row) if row else None
+
+def list_sessions(limit: int = 20, offset: int = 0, db_file: str = store_db_file) -> List[Dict]:
+    # Most recently active sessions first, one page at a time.
+    rows = get_connection(db_file).execute(
+        "SELECT session_id, summary FROM sessions ORDER BY updated_at DESC, rowid DESC LIMIT ? OFFSET ?",
+        (limit, offset)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+def list_sessions_with_summary(summary: str, limit: Optional[int] = None, db_file: str = store_db_file) -> List[Dict]:
+    # Oldest first; used to find sessions that were never titled.
+    rows = get_connection(db_file).execute(
+        "SELECT session_id, summary FROM sessions WHERE summary = ? ORDER BY created_at LIMIT ?",
+        (summary, -1 if limit is None else limit)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+def count_sessions(db_file: str = store_db_file) -> int:
+    return get_connection(db_file).execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+def load_messages(session_id: str, db_file: str = store_db_file) -> List[Dict]:
+    rows = get_connection(db_file).execute(
+        "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+    ).fetchall()
+    return [{"role": row["role"], "content": json.loads(row["content"])} for row in rows]
+
+def append_message(session_id: str, message: Dict, db_file: str = store_db_file):
+    now = time.time()
+    conn = get_connection(db_file)
+    with conn:
+        conn.execute(
+            "INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+            (session_id, message["role"], json.dumps(message["content"]), now)
+        )
+        conn.execute("UPDATE sessions SET updated_at = ? WHERE session_id = ?", (now, session_id))
+
+def set_summary(session_id: str, summary: str, only_if: Optional[str] = None, db_file: str = store_db_file) -> bool:
+    # With only_if, the summary is only replaced while it still is that value (e.g. DEFAULT_SUMMARY),
+    # so a title written in the meantime is kept. Returns whether the summary was set.
+    conn = get_connection(db_file)
+    with conn:
+        if only_if is None:
+            cursor = conn.execute("UPDATE sessions SET summary = ? WHERE session_id = ?", (summary, session_id))
+        else:
+            cursor = conn.execute(
+                "UPDATE sessions SET summary = ? WHERE session_id = ? AND summary = ?", (summary, session_id, only_if)
+            )
+    return cursor.rowcount > 0
+
+def delete_sessions_before(cutoff: float, db_file: str = store_db_file) -> List[Dict]:
+    # Removes sessions not active since cutoff with their messages and returns them, messages included.
+    conn = get_connection(db_file)
+    with conn:
+        rows = conn.execute(
+            "SELECT session_id, summary, created_at, updated_at FROM sessions WHERE updated_at < ?", (cutoff,)
+        ).fetchall()
+        sessions = []
+        for row in rows:
+            session = dict(row)
+            session["messages"] = [
+                {"role": m["role"], "content": json.loads(m["content"])}
+                for m in conn.execute("SELECT role, content FROM messages WHERE session_id = ? ORDER BY id", (row["session_id"],))
+            ]
+            sessions.append(session)
+        conn.execute("DELETE FROM messages WHERE session_id IN (SELECT session_id FROM sessions WHERE updated_at < ?)", (cutoff,))
+        conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+    return sessions
+
+# Migration ---------------------------------------------------------------------------------------------------------
+
+def migrate_from_json(json_file: str = legacy_conversations_file, db_file: str = store_db_file) -> int:
+    # One-time import of the old whole-file conversations.json store. Returns the number of sessions imported.
+    conn = get_connection(db_file)
+    if conn.execute("SELECT 1 FROM migrations WHERE name = ?", (json_file,)).fetchone():
+        return 0
+    if not os.path.exists(json_file):
+        return 0
+
+    with open(json_file, 'r') as f:
+        data = json.load(f)
+
+    sessions = data.get("sessions", [])
+    # The JSON file keeps the newest session first; give older sessions older timestamps.
+    base = time.time() - len(sessions)
+    with conn:
+        for position, sess in enumerate(reversed(sessions)):
+            stamp = base + position
+            conn.execute(
+                "INSERT OR IGNORE INTO sessions (session_id, summary, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (sess["session_id"], sess.get("summary", DEFAULT_SUMMARY), stamp, stamp)
+            )
+            conn.executemany(
+                "INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                [(sess["session_id"], m["role"], json.dumps(m["content"]), stamp) for m in sess.get("messages", [])]
+            )
+        conn.execute("INSERT INTO migrations (name, applied_at) VALUES (?, ?)", (json_file, time.time()))
+
+    os.replace(json_file, json_file + ".migrated")
+    return len(sessions)
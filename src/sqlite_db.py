@@ -0,0 +1,38 @@
+import os
+import sqlite3
+import threading
+
+# Per-thread SQLite connections for the app's stores (sessions, jobs, artifact and tool caches).
+# A sqlite3 connection can't be shared between threads and Streamlit runs each session on its own
+# thread, so every thread keeps one connection per database file. Databases use WAL journaling, so
+# readers don't wait for a writer, and a writer waits up to BUSY_TIMEOUT_MS for another one.
+
+BUSY_TIMEOUT_MS = 30000
+
+_local = threading.local()
+
+def configure(conn):
+    # Also applied by storage.py to the pooled SQLAlchemy connections of the agno session storage.
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # With WAL, NORMAL only risks the last transactions on power loss, never corruption.
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def get_connection(db_file: str, schema: str = "") -> sqlite3.Connection:
+    # schema is run once per new connection, e.g. to create the tables.
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_file)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        conn = sqlite3.connect(db_file, timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.row_factory = sqlite3.Row
+        configure(conn)
+        if schema:
+            conn.executescript(schema)
+        connections[db_file] = conn
+    return conn
@@ -0,0 +1,134 @@
+import os
+import json
+import gzip
+import time
+import logging
+import argparse
+import threading
+from typing import Dict, List
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+import sqlite_db
+
+# Storage layer for the agno SqliteStorage shared by every agent and the team: one pooled SQLAlchemy
+# engine per database file with WAL journaling, so concurrent sessions read while another one writes
+# instead of stalling on "database is locked", plus indexes for the history lookups and pruning of
+# old sessions by age. Pruning from the command line also removes the sessions from the app's session
+# store and releases their audio, so the artifact cache can evict it.
+#
+#   python src/storage.py --prune-days 90 --archive   move sessions idle for 90 days to temp/archive/
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("PODCAST_DB_POOL_SIZE", 8))
+MAX_OVERFLOW = int(os.getenv("PODCAST_DB_POOL_OVERFLOW", 8))
+archive_dir = "temp/archive"
+
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+def _configure_connection(dbapi_connection, connection_record):
+    sqlite_db.configure(dbapi_connection)
+
+def get_engine(db_file: str) -> Engine:
+    # One engine (and connection pool) per database file for the whole process.
+    with _engines_lock:
+        engine = _engines.get(db_file)
+        if engine is None:
+            os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+            engine = create_engine(
+                f"sqlite:///{db_file}",
+                poolclass=QueuePool,
+                pool_size=POOL_SIZE,
+                max_overflow=MAX_OVERFLOW,
+                pool_pre_ping=True,
+                connect_args={"timeout": sqlite_db.BUSY_TIMEOUT_MS / 1000, "check_same_thread": False},
+            )
+            event.listen(engine, "connect", _configure_connection)
+            _engines[db_file] = engine
+        return engine
+
+def ensure_indexes(engine: Engine, table_name: str):
+    with engine.begin() as conn:
+        # session_id is the primary key, which SQLite already indexes.
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_created_at ON {table_name}(created_at)"))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_updated_at ON {table_name}(updated_at)"))
+
+def create_storage(table_name: str, db_file: str, mode: str = "agent"):
+    from agno.storage.sqlite import SqliteStorage
+    from sqlalchemy.inspection import inspect
+    from sqlalchemy.orm import sessionmaker
+
+    engine = get_engine(db_file)
+    # SqliteStorage ignores a db_engine passed to it (it falls back to an in-memory database), so it is
+    # built for the file and then pointed at the pooled engine.
+    storage = SqliteStorage(table_name=table_name, db_file=db_file, mode=mode)
+    storage.db_engine.dispose()
+    storage.db_engine = engine
+    storage.inspector = inspect(engine)
+    storage.SqlSession = sessionmaker(bind=engine)
+    # agno creates the table on the first write; create it now so the indexes can be added.
+    storage.create()
+    ensure_indexes(engine, table_name)
+    return storage
+
+def _archive(name: str, rows: List[Dict]):
+    # Appends rows to a gzipped JSON lines file in archive_dir.
+    if not rows:
+        return
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.jsonl.gz")
+    with gzip.open(path, "at") as f:
+        for row in rows:
+            f.write(json.dumps(row, default=str) + "\n")
+    logger.info("Archived %d sessions to %s", len(rows), path)
+
+def prune(db_file: str, table_name: str, max_age_days: float, archive: bool = True) -> int:
+    # Deletes sessions not updated for max_age_days, first appending them to a gzipped JSON lines
+    # archive when archive is set. Returns the number of sessions removed.
+    engine = get_engine(db_file)
+    cutoff = int(time.time() - max_age_days * 24 * 60 * 60)
+    with engine.begin() as conn:
+        # updated_at is empty for sessions that were only ever written once
+        condition = "COALESCE(updated_at, created_at) < :cutoff"
+        if archive:
+            rows = conn.execute(text(f"SELECT * FROM {table_name} WHERE {condition}"), {"cutoff": cutoff}).mappings().all()
+            _archive(table_name, [dict(row) for row in rows])
+        removed = conn.execute(text(f"DELETE FROM {table_name} WHERE {condition}"), {"cutoff": cutoff}).rowcount
+    # Fold the WAL back into the database so the freed pages can be reused.
+    with engine.connect() as conn:
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    return removed
+
+def prune_app_sessions(max_age_days: float, archive: bool = True, db_file: str = None) -> int:
+    # Removes sessions idle for max_age_days from the app's session store and releases their audio
+    # in the artifact cache. Returns the number of sessions removed.
+    import artifact_cache
+    import session_store
+
+    cutoff = time.time() - max_age_days * 24 * 60 * 60
+    sessions = session_store.delete_sessions_before(cutoff, db_file=db_file or session_store.store_db_file)
+    if archive:
+        _archive("app_sessions", sessions)
+    for session in sessions:
+        artifact_cache.release_session(session["session_id"])
+    if sessions:
+        artifact_cache.evict()
+    return len(sessions)
+
+if __name__ == "__main__":
+    import agents
+
+    parser = argparse.ArgumentParser(description="Prune old sessions from the shared agno session storage.")
+    parser.add_argument("--prune-days", type=float, required=True, help="remove sessions not updated for this many days")
+    parser.add_argument("--archive", action="store_true", help=f"write removed sessions to {archive_dir} first")
+    parser.add_argument("--db-file", default=agents.storage_db_file)
+    parser.add_argument("--table", default=agents.storage_table_name)
+    args = parser.parse_args()
+
+    removed = prune(args.db_file, args.table, args.prune_days, archive=args.archive)
+    removed_app_sessions = prune_app_sessions(args.prune_days, archive=args.archive)
+    print(json.dumps({"removed": removed, "removed_app_sessions": removed_app_sessions}, indent=4))
@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+# Concurrency stress test for the shared agno session storage: many simultaneous sessions each read
+# their session and write it back with a growing history, as agents do on every run. Compares agno's
+# default SqliteStorage engine with the pooled WAL engine from storage.py and reports throughput,
+# latency and lock errors. Runs in a scratch directory; no API keys needed.
+#
+#   python src/stress_storage.py --sessions 64 --turns 20 --workers 32
+
+HISTORY_MESSAGE = {"role": "assistant", "content": "This is a sentence of a podcast script. " * 40}
+
+def percentile(values: List[float], q: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+def build_storage(kind: str, db_file: str):
+    import storage
+    from agno.storage.sqlite import SqliteStorage
+
+    if kind == "tuned":
+        return storage.create_storage("stress_sessions", db_file)
+    # Created up front like the tuned one, so only contention is measured and not the table creation race.
+    default = SqliteStorage(table_name="stress_sessions", db_file=db_file)
+    default.create()
+    return default
+
+def run_session(store, session_id: str, turns: int, latencies: List[float], errors: List[str], lock: threading.Lock):
+    from agno.storage.session.agent import AgentSession
+
+    runs = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        try:
+            store.read(session_id)
+            runs.append(HISTORY_MESSAGE)
+            store.upsert(AgentSession(
+                session_id=session_id,
+                agent_id="stress-agent",
+                memory={"runs": runs},
+                session_data={"session_id": session_id},
+            ))
+        except Exception as e:
+            with lock:
+                errors.append(f"{type(e).__name__}: {e}")
+            continue
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+def stress(kind: str, sessions: int, turns: int, workers: int) -> Dict:
+    db_file = f"temp/{kind}.db"
+    store = build_storage(kind, db_file)
+    latencies: List[float] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for s in range(sessions):
+            executor.submit(run_session, store, f"{kind}-{s}", turns, latencies, errors, lock)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "storage": kind,
+        "turns": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "elapsed_s": elapsed,
+        "turns_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+        "p95_ms": percentile(latencies, 95) * 1000 if latencies else None,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrency stress test for the shared session storage.")
+    parser.add_argument("--sessions", type=int, default=64, help="simultaneous sessions")
+    parser.add_argument("--turns", type=int, default=20, help="read + write cycles per session")
+    parser.add_argument("--workers", type=int, default=32, help="threads driving the sessions")
+    parser.add_argument("--storage", choices=["default", "tuned", "both"], default="both")
+    parser.add_argument("--out", help="write the report as JSON to this file")
+    args = parser.parse_args()
+    out_file = os.path.abspath(args.out) if args.out else None
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(tempfile.mkdtemp(prefix="podcast-stress-"))
+    os.makedirs("temp", exist_ok=True)
+
+    kinds = ["default", "tuned"] if args.storage == "both" else [args.storage]
+    results = [stress(kind, args.sessions, args.turns, args.workers) for kind in kinds]
+    print(json.dumps(results, indent=4))
+    if out_file:
+        with open(out_file, "w") as f:
+            json.dump(results, f, indent=4)
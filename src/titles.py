@@ -0,0 +1,125 @@
+import re
+import logging
+import argparse
+import threading
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+import session_store
+import tracing
+
+# Session titles, generated off the critical path: a finished turn only queues its session here and
+# the title is produced on a background worker by the summary agent (pinned to the local Ollama
+# model), falling back to a heuristic taken from the response itself when no model answers.
+#
+#   python src/titles.py              title every "New Session" that already has a conversation
+#   python src/titles.py --heuristic  same, without calling a model
+
+logger = logging.getLogger(__name__)
+
+MAX_TITLE_WORDS = 5
+MAX_TITLE_CHARS = 60
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="podcast-title")
+_pending = set()
+_pending_lock = threading.Lock()
+
+def _first_line(text: str) -> str:
+    text = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL)
+    return next((line.strip() for line in text.splitlines() if re.search(r"\w", line)), "")
+
+def heuristic_title(text: str) -> str:
+    # The first line of the response without markdown and list / topic numbering, cut to a few words.
+    line = re.sub(r"[#*_`>\[\]]+", "", _first_line(text))
+    line = re.sub(r"^\s*(?:[-+•]|\d+[.)]|topic\s*\d+\s*:)\s*", "", line, flags=re.IGNORECASE)
+    words = line.split()[:MAX_TITLE_WORDS]
+    return " ".join(words).strip(" :,.-")[:MAX_TITLE_CHARS] or session_store.DEFAULT_SUMMARY
+
+def model_title(text: str, session_id: str) -> str:
+    import agents
+
+    # The agent is shared by every session on this thread, so it runs without a session and its run
+    # history is cleared after each title instead of growing with every titled session.
+    agent = agents.get_summary_agent(session_id)
+    title = ""
+    try:
+        for chunk in agent.run(_first_line(text), stream=True):
+            if hasattr(chunk, 'content') and chunk.content:
+                title += chunk.content
+    finally:
+        if agent.memory is not None:
+            agent.memory.clear()
+    return _first_line(title).strip(" \"'")[:MAX_TITLE_CHARS]
+
+def generate_title(text: str, session_id: str, use_model: bool = True) -> str:
+    if use_model:
+        try:
+            with tracing.span("summary", session_id=session_id):
+                title = model_title(text, session_id)
+            if title:
+                return title
+        except Exception as e:
+            logger.warning("Summary model failed for %s, using the heuristic title: %s", session_id, e)
+    return heuristic_title(text)
+
+def _title_session(session_id: str, text: str, use_model: bool) -> Optional[str]:
+    try:
+        title = generate_title(text, session_id, use_model=use_model)
+        # The session may have been titled while the model was still answering.
+        if not session_store.set_summary(session_id, title, only_if=session_store.DEFAULT_SUMMARY):
+            return None
+        return title
+    finally:
+        with _pending_lock:
+            _pending.discard(session_id)
+
+def schedule(session_id: str, text: str, use_model: bool = True) -> bool:
+    # Queues a title for a session that doesn't have one yet. Returns False if there is nothing to do.
+    session = session_store.get_session(session_id)
+    if session is None or session["summary"] != session_store.DEFAULT_SUMMARY or not _first_line(text):
+        return False
+    with _pending_lock:
+        if session_id in _pending:
+            return False
+        _pending.add(session_id)
+    _executor.submit(_title_session, session_id, text, use_model)
+    return True
+
+def is_pending(session_id: str) -> bool:
+    with _pending_lock:
+        return session_id in _pending
+
+def first_response(messages: List[Dict]) -> str:
+    # Old sessions are titled from their first text answer, or their first prompt if they have none.
+    texts = [m for m in messages if isinstance(m["content"], str) and m["content"].strip()]
+    answer = next((m["content"] for m in texts if m["role"] == "assistant"), None)
+    return answer or next((m["content"] for m in texts), "")
+
+def backfill(use_model: bool = True, limit: Optional[int] = None) -> Dict[str, str]:
+    # Titles untitled sessions in bulk; the model calls run on the worker pool.
+    titled = {}
+    sessions = session_store.list_sessions_with_summary(session_store.DEFAULT_SUMMARY, limit=limit)
+    futures = {}
+    for session in sessions:
+        text = first_response(session_store.load_messages(session["session_id"]))
+        if not _first_line(text):
+            continue
+        futures[session["session_id"]] = _executor.submit(generate_title, text, session["session_id"], use_model)
+    for session_id, future in futures.items():
+        title = future.result()
+        # Skipped if the background titler or the user titled the session in the meantime.
+        if session_store.set_summary(session_id, title, only_if=session_store.DEFAULT_SUMMARY):
+            titled[session_id] = title
+    return titled
+
+if __name__ == "__main__":
+    import dotenv
+
+    parser = argparse.ArgumentParser(description="Title old \"New Session\" sessions in bulk.")
+    parser.add_argument("--heuristic", action="store_true", help="derive titles from the first answer, without a model")
+    parser.add_argument("--limit", type=int, help="title at most this many sessions")
+    args = parser.parse_args()
+
+    dotenv.load_dotenv()
+    for session_id, title in backfill(use_model=not args.heuristic, limit=args.limit).items():
+        print(f"{session_id}\t{title}")
@@ -0,0 +1,155 @@
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import functools
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional
+
+import sqlite_db
+
+# Persistent TTL cache for web search, article and arXiv results. The same trending topics are
+# researched over and over across sessions; repeated calls are answered from SQLite instead of
+# going back to the network. Expired entries are purged on write, at most once per PURGE_INTERVAL.
+
+cache_db_file = "temp/tool_cache.db"
+
+# Seconds each tool's results stay fresh, by function name. Functions not listed here are never cached.
+TOOL_TTLS: Dict[str, float] = {
+    "google_search": 6 * 60 * 60,
+    "read_article": 24 * 60 * 60,
+    "search_arxiv_and_return_articles": 7 * 24 * 60 * 60,
+    "read_arxiv_papers": 30 * 24 * 60 * 60,
+    "search_web": 6 * 60 * 60,
+    "fetch_article": 24 * 60 * 60,
+    "search_papers": 7 * 24 * 60 * 60,
+}
+
+# Seconds between purges of expired entries.
+PURGE_INTERVAL = 60 * 60
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+_metrics_lock = threading.Lock()
+_metrics = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tool_cache (
+    key TEXT PRIMARY KEY,
+    tool TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tool_cache_expires ON tool_cache(expires_at);
+"""
+
+def _connection() -> sqlite3.Connection:
+    return sqlite_db.get_connection(cache_db_file, SCHEMA)
+
+def normalize_value(value: Any) -> Any:
+    if isinstance(value, str):
+        value = re.sub(r"\s+", " ", value).strip()
+        if re.match(r"https?://", value, re.IGNORECASE):
+            # Fragments and trailing slashes don't change the page that is fetched
+            return value.split("#", 1)[0].rstrip("/")
+        return value.lower()
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    return value
+
+def make_key(tool: str, kwargs: Dict) -> str:
+    normalized = {k: normalize_value(v) for k, v in kwargs.items() if k != "agent"}
+    payload = json.dumps([tool, normalized], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get(key: str) -> Optional[Any]:
+    row = _connection().execute(
+        "SELECT value FROM tool_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+def put(key: str, tool: str, value: Any, ttl: float):
+    conn = _connection()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO tool_cache (key, tool, value, expires_at) VALUES (?, ?, ?, ?)",
+            (key, tool, json.dumps(value), time.time() + ttl)
+        )
+    _maybe_purge()
+
+def purge_expired() -> int:
+    conn = _connection()
+    with conn:
+        return conn.execute("DELETE FROM tool_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+def _maybe_purge():
+    global _last_purge
+    with _purge_lock:
+        now = time.time()
+        if now - _last_purge < PURGE_INTERVAL:
+            return
+        _last_purge = now
+    purge_expired()
+
+def _record(tool: str, hit: bool):
+    with _metrics_lock:
+        _metrics[tool]["hits" if hit else "misses"] += 1
+
+def get_metrics() -> Dict[str, Dict[str, float]]:
+    with _metrics_lock:
+        metrics = {tool: dict(counts) for tool, counts in _metrics.items()}
+    for counts in metrics.values():
+        total = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = counts["hits"] / total if total else 0.0
+    return metrics
+
+# Results that are not worth keeping for a whole TTL: agno toolkits report failures as strings (e.g.
+# "Error reading article from ...") and empty results as "[]".
+ERROR_RESULT = re.compile(r"^\s*error\b", re.IGNORECASE)
+
+def is_valid_result(value: Any) -> bool:
+    if not value:
+        return False
+    if isinstance(value, str):
+        if ERROR_RESULT.match(value):
+            return False
+        try:
+            return bool(json.loads(value))
+        except ValueError:
+            return True
+    return True
+
+# Wrappers ----------------------------------------------------------------------------------------------------------
+
+def cached(tool: str, ttl: Optional[float] = None, namespace: str = "", valid: Callable[[Any], bool] = is_valid_result) -> Callable:
+    # namespace keeps apart toolkits whose fixed settings change the result (e.g. a different max_results);
+    # valid decides which results are cached.
+    ttl = TOOL_TTLS.get(tool, 0) if ttl is None else ttl
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            call_args = dict(kwargs)
+            call_args.update({f"arg{i}": arg for i, arg in enumerate(args)})
+            key = make_key(f"{namespace}:{tool}", call_args)
+            value = get(key)
+            _record(tool, value is not None)
+            if value is not None:
+                return value
+            value = fn(*args, **kwargs)
+            # Errors and empty results are usually transient; don't pin them for the whole TTL
+            if valid(value):
+                put(key, tool, value, ttl)
+            return value
+        return wrapper
+    return decorator
+
+def cache_toolkit(toolkit, ttls: Optional[Dict[str, float]] = None, namespace: str = ""):
+    # Wraps the registered functions of an agno toolkit in place, for the functions that have a TTL.
+    ttls = {**TOOL_TTLS, **(ttls or {})}
+    for name, function in toolkit.functions.items():
+        if name in ttls and function.entrypoint is not None:
+            function.entrypoint = cached(name, ttls[name], namespace)(function.entrypoint)
+    return toolkit
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import uuid
+import argparse
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterator, List, Optional
+
+# Per-stage tracing for chat turns: a trace per turn, a span per stage (routing, model calls, tool
+# calls, audio, storage) carrying durations plus token counts and byte sizes. Finished traces are
+# appended to a JSON lines file and aggregated for a Prometheus text export. The file is rotated
+# once it reaches MAX_FILE_BYTES, keeping a single older file next to it.
+
+traces_file = "temp/traces.jsonl"
+MAX_FILE_BYTES = int(os.getenv("PODCAST_TRACES_MAX_BYTES", 10 * 1024 * 1024))
+READ_BLOCK_BYTES = 64 * 1024
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("podcast_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("podcast_span", default=None)
+
+_export_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration: float = 0.0
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    parent_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+@dataclass
+class Trace:
+    name: str
+    start: float
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    duration: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    spans: List[Span] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "spans": [asdict(span) for span in self.spans],
+        }
+
+def _finish(span: Span):
+    with _stats_lock:
+        _stats[span.name]["count"] += 1
+        _stats[span.name]["seconds"] += span.duration
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(span)
+
+@contextmanager
+def span(name: str, **attributes):
+    # Spans outside of a trace still count towards the aggregated metrics.
+    parent = _current_span.get()
+    current = Span(name=name, start=time.time(), parent_id=parent.span_id if parent else None, attributes=attributes)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _current_span.reset(token)
+        _finish(current)
+
+def record_span(name: str, duration: float, **attributes):
+    # For stages that are only known after the fact, e.g. model calls reported in run metrics.
+    parent = _current_span.get()
+    _finish(Span(name=name, start=time.time() - duration, duration=duration,
+                 parent_id=parent.span_id if parent else None, attributes=attributes))
+
+@contextmanager
+def trace(name: str, export: bool = True, **attributes):
+    # Inside an active trace this is just another span, so callers can nest freely.
+    if _current_trace.get() is not None:
+        with span(name, **attributes):
+            yield _current_trace.get()
+        return
+
+    current = Trace(name=name, start=time.time(), attributes=attributes)
+    token = _current_trace.set(current)
+    start = time.perf_counter()
+    try:
+        with span(name):
+            yield current
+    finally:
+        current.duration = time.perf_counter() - start
+        _current_trace.reset(token)
+        if export:
+            export_jsonl(current)
+
+def _traced_tool(name: str, entrypoint):
+    @functools.wraps(entrypoint)
+    def wrapper(*args, **kwargs):
+        with span(f"tool.{name}") as current:
+            result = entrypoint(*args, **kwargs)
+            current.set(result_bytes=len(str(result).encode("utf-8")) if result is not None else 0)
+            return result
+    return wrapper
+
+def trace_toolkit(toolkit):
+    # Wraps every registered function of an agno toolkit in a "tool.<name>" span.
+    for name, function in toolkit.functions.items():
+        if function.entrypoint is not None:
+            function.entrypoint = _traced_tool(name, function.entrypoint)
+    return toolkit
+
+# Export ------------------------------------------------------------------------------------------------------------
+
+def export_jsonl(trace: Trace, path: str = None):
+    path = path or traces_file
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(trace.to_dict(), default=str) + "\n"
+    with _export_lock:
+        if os.path.exists(path) and os.path.getsize(path) + len(line) > MAX_FILE_BYTES:
+            os.replace(path, path + ".1")
+        with open(path, "a") as f:
+            f.write(line)
+
+def _lines_from_end(path: str) -> Iterator[str]:
+    # Lines of a file, last one first, read in blocks from the end so only what is consumed is read.
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        rest = b""
+        while position > 0:
+            size = min(READ_BLOCK_BYTES, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + rest).split(b"\n")
+            # The first piece may be the end of a line that started in the previous block.
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line.decode("utf-8")
+        if rest.strip():
+            yield rest.decode("utf-8")
+
+def load_traces(session_id: Optional[str] = None, limit: int = 10, path: str = None) -> List[Dict]:
+    # Most recent traces first, optionally only those of one session, from the file and the rotated one.
+    path = path or traces_file
+    traces = []
+    for file in (path, path + ".1"):
+        if not os.path.exists(file):
+            continue
+        for line in _lines_from_end(file):
+            entry = json.loads(line)
+            if session_id is None or entry["attributes"].get("session_id") == session_id:
+                traces.append(entry)
+                if len(traces) >= limit:
+                    return traces
+    return traces
+
+def _prometheus(stats: Dict[str, Dict[str, float]]) -> str:
+    lines = [
+        "# HELP podcast_stage_seconds Time spent per pipeline stage.",
+        "# TYPE podcast_stage_seconds summary",
+    ]
+    for name, values in sorted(stats.items()):
+        lines.append(f'podcast_stage_seconds_count{{stage="{name}"}} {values["count"]}')
+        lines.append(f'podcast_stage_seconds_sum{{stage="{name}"}} {values["seconds"]:.6f}')
+    return "\n".join(lines) + "\n"
+
+def render_prometheus() -> str:
+    # Aggregates of this process.
+    with _stats_lock:
+        stats = {name: dict(values) for name, values in _stats.items()}
+    return _prometheus(stats)
+
+def render_prometheus_from_file(path: str = None) -> str:
+    stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+    for entry in load_traces(limit=10 ** 9, path=path):
+        for s in entry["spans"]:
+            stats[s["name"]]["count"] += 1
+            stats[s["name"]]["seconds"] += s["duration"]
+    return _prometheus(stats)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export recorded turn traces.")
+    parser.add_argument("--format", choices=["prometheus", "jsonl"], default="prometheus")
+    parser.add_argument("--file", default=traces_file)
+    args = parser.parse_args()
+
+    if args.format == "prometheus":
+        print(render_prometheus_from_file(args.file), end="")
+    else:
+        for entry in reversed(load_traces(limit=10 ** 9, path=args.file)):
+            print(json.dumps(entry))
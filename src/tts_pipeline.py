@@ -0,0 +1,259 @@
+import os
+import re
+import time
+import contextvars
+from uuid import uuid4
+from itertools import islice
+from collections import deque
+from typing import Deque, Iterator, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from agno.agent import Agent
+from agno.media import AudioArtifact
+from agno.tools import Toolkit
+
+import artifact_cache
+import audio_stream
+import rate_limits
+import tracing
+
+# Text to speech pipeline: the podcast script is cleaned up deterministically, split at
+# paragraph / sentence boundaries and the chunks are synthesized concurrently, then appended in
+# order to one MP3 on disk as they finish.
+
+MAX_CHUNK_CHARS = 1200
+MAX_WORKERS = 4
+
+# Sections that are read, not spoken. Only the list under such a heading is skipped.
+SKIPPED_SECTION_TITLES = re.compile(r"(table of contents|contents|index|chapters)\s*:?$", re.IGNORECASE)
+LIST_ITEM = re.compile(r"^\s*(?:[-+*•]|\d+[.)])\s+")
+HEADING_LINE = re.compile(r"^\s*#{1,6}\s+(.*)$")
+MARKDOWN_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+MARKDOWN_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+SOUND_CUE = re.compile(r"🎧[^\n]*|\[[^\]]*\]|\((?:sfx|sound|music|transition|pause)[^)]*\)", re.IGNORECASE)
+SEPARATOR_LINE = re.compile(r"^\s*([-*_=]\s*){3,}$")
+SPEAKER_LABEL = re.compile(r"^(?:host|co-host|guest|narrator|speaker\s*\d*)\s*(?:\d+)?\s*:\s*", re.IGNORECASE)
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+def clean_script(script: str) -> str:
+    paragraphs = []
+    current = []
+    skipping_section = False
+    skipped_items = 0
+
+    for line in script.splitlines():
+        heading = HEADING_LINE.match(line)
+        if heading:
+            title = heading.group(1).strip().strip("*:").strip()
+            skipping_section = bool(SKIPPED_SECTION_TITLES.match(title))
+            skipped_items = 0
+            if current:
+                paragraphs.append(" ".join(current))
+                current = []
+            continue
+        if skipping_section:
+            # The skipped list ends at the first line that isn't an item of it (e.g. a bold "**Hook**"
+            # title) or at a blank line after its items, so the script after it is still spoken.
+            if LIST_ITEM.match(line):
+                skipped_items += 1
+                continue
+            if not line.strip() and not skipped_items:
+                continue
+            skipping_section = False
+        if SEPARATOR_LINE.match(line):
+            continue
+
+        # Links keep their text and images are dropped; URLs are never read out
+        line = MARKDOWN_LINK.sub(r"\1", MARKDOWN_IMAGE.sub("", line))
+        line = SOUND_CUE.sub("", line)
+        line = re.sub(r"[*_`>]+", "", line)
+        line = re.sub(r"^\s*(?:[-+•]|\d+[.)])\s+", "", line).strip()
+        line = SPEAKER_LABEL.sub("", re.sub(r"\s{2,}", " ", line))
+        if not line:
+            if current:
+                paragraphs.append(" ".join(current))
+                current = []
+            continue
+        current.append(line)
+
+    if current:
+        paragraphs.append(" ".join(current))
+    return "\n\n".join(p for p in paragraphs if re.search(r"\w", p))
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    # A sentence over the TTS request limit is cut after a comma in its second half or else at the
+    # last space, and only mid-word when it has neither.
+    parts = []
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(",", max_chars // 2, max_chars) + 1
+        if cut <= 0:
+            cut = sentence.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        parts.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    parts.append(sentence)
+    return parts
+
+def split_script(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    # Pack whole paragraphs into chunks; paragraphs that are too long are split between sentences,
+    # and sentences that are too long at commas or spaces.
+    pieces = []
+    for paragraph in text.split("\n\n"):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+        else:
+            for sentence in SENTENCE_END.split(paragraph):
+                pieces.extend(_split_long(sentence, max_chars))
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        if current and len(current) + len(piece) + 1 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+# Backends ----------------------------------------------------------------------------------------------------------
+
+class StubTTSBackend:
+    # Offline stand-in for Cartesia: returns silent MP3 frames (one per word) after an optional delay.
+    SILENT_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+    def __init__(self, latency: float = 0.0, voice_id: str = "stub", model_id: str = "stub"):
+        self.latency = latency
+        self.voice_id = voice_id
+        self.model_id = model_id
+
+    def synthesize(self, text: str) -> bytes:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.SILENT_FRAME * max(1, len(text.split()))
+
+class CartesiaTTSBackend:
+    def __init__(self, api_key: Optional[str] = None, voice_id: Optional[str] = None, model_id: str = "sonic-2"):
+        from cartesia import Cartesia
+
+        self.client = Cartesia(api_key=api_key or os.getenv("CARTESIA_API_KEY"))
+        self.voice_id = voice_id or os.getenv("CARTESIA_VOICE_ID", "78ab82d5-25be-4f7d-82b3-7ad64e5b85b2")
+        self.model_id = model_id
+
+    def synthesize(self, text: str) -> bytes:
+        rate_limits.acquire("cartesia")
+        audio = self.client.tts.bytes(
+            model_id=self.model_id,
+            transcript=text,
+            voice={"mode": "id", "id": self.voice_id},
+            output_format={"container": "mp3", "sample_rate": 44100, "bit_rate": 128000},
+        )
+        return b"".join(audio)
+
+def get_default_backend():
+    if os.getenv("PODCAST_TTS_BACKEND", "cartesia") == "stub":
+        return StubTTSBackend()
+    return CartesiaTTSBackend()
+
+class CachedTTSBackend:
+    # Serves chunks that were already synthesized with the same voice and model from the artifact cache.
+    def __init__(self, backend):
+        self.backend = backend
+        self.voice_id = backend.voice_id
+        self.model_id = backend.model_id
+
+    def synthesize(self, text: str) -> bytes:
+        key = artifact_cache.make_key(text, voice=self.voice_id, model=self.model_id)
+        with tracing.span("tts.chunk", chars=len(text)) as span:
+            audio = artifact_cache.get(key)
+            span.set(cached=audio is not None)
+            if audio is None:
+                audio = self.backend.synthesize(text)
+                artifact_cache.put(key, audio)
+            span.set(bytes=len(audio))
+        return audio
+
+# Pipeline ----------------------------------------------------------------------------------------------------------
+
+def iter_synthesized(chunks: List[str], synthesize, max_workers: int = MAX_WORKERS) -> Iterator[bytes]:
+    # Yields the audio of each chunk in order as soon as it (and every chunk before it) is ready.
+    # At most 2 * max_workers chunks are in flight, so finished audio waiting for an earlier slow
+    # chunk never piles up for the whole script.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: Deque = deque()
+        remaining = iter(chunks)
+        # Each task runs in a copy of the caller's context so its span lands in the caller's trace.
+        submit = lambda chunk: pending.append(executor.submit(contextvars.copy_context().run, synthesize, chunk))
+        for chunk in islice(remaining, 2 * max_workers):
+            submit(chunk)
+        while pending:
+            audio = pending.popleft().result()
+            chunk = next(remaining, None)
+            if chunk is not None:
+                submit(chunk)
+            yield audio
+
+def synthesize_script_to_file(script: str, backend=None, max_workers: int = MAX_WORKERS, max_chars: int = MAX_CHUNK_CHARS) -> Optional[str]:
+    # Writes the episode into the artifact cache chunk by chunk and returns its path (None if there is
+    # nothing to say). The first chunk is announced through audio_stream.notify_segment as soon as it
+    # is synthesized, so playback can start while the rest of the episode is still being generated.
+    backend = backend or get_default_backend()
+    text = clean_script(script)
+    if not text:
+        return None
+
+    # A repeated script is served whole; otherwise only the chunks that changed are synthesized.
+    script_key = artifact_cache.make_key(text, voice=backend.voice_id, model=backend.model_id)
+    path = artifact_cache.artifact_path(script_key)
+    if artifact_cache.contains(script_key):
+        return path
+
+    chunks = split_script(text, max_chars=max_chars)
+    cached_backend = CachedTTSBackend(backend)
+    # MP3 frames are self-contained, so the chunks can simply be appended in order.
+    with audio_stream.StreamingAudioWriter(path) as writer:
+        for i, audio in enumerate(iter_synthesized(chunks, cached_backend.synthesize, max_workers=max_workers)):
+            writer.write(audio)
+            if i == 0:
+                # The chunk's own artifact is what gets played early. The listener pins it for the rest of
+                # the turn; the puts of the chunks after it may have evicted it before that, so it is
+                # written again once it is pinned.
+                segment_key = artifact_cache.make_key(chunks[0], voice=backend.voice_id, model=backend.model_id)
+                audio_stream.notify_segment(artifact_cache.artifact_path(segment_key))
+                if not artifact_cache.contains(segment_key):
+                    artifact_cache.put(segment_key, audio)
+    artifact_cache.register(script_key, path, writer.bytes_written)
+    return path
+
+class PodcastAudioTools(Toolkit):
+    def __init__(self, backend=None, max_workers: int = MAX_WORKERS, **kwargs):
+        super().__init__(name="podcast_audio_tools", **kwargs)
+        self.backend = backend
+        self.max_workers = max_workers
+        self.register(self.text_to_speech)
+
+    def synthesize(self, script: str) -> Optional[str]:
+        # Also called directly by the pipeline, so a script never has to pass through the model.
+        if self.backend is None:
+            self.backend = get_default_backend()
+        return synthesize_script_to_file(script, backend=self.backend, max_workers=self.max_workers)
+
+    def text_to_speech(self, agent: Agent, script: str) -> str:
+        """Convert a full podcast script into one MP3 audio file.
+
+        Args:
+            script (str): The podcast script, exactly as written. Titles, sound cues and tables of contents are removed automatically.
+
+        Returns:
+            str: A message saying whether the audio file was generated.
+        """
+        path = self.synthesize(script)
+        if path is None:
+            return "The script has no spoken content to convert."
+        # The artifact points at the file in the cache instead of carrying the whole episode as base64.
+        agent.add_audio(AudioArtifact(id=str(uuid4()), url=path, mime_type="audio/mpeg"))
+        return "Audio generated successfully for the whole script."
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app runs its modules from src/ as top-level imports (streamlit run src/main.py).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
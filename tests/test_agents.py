@@ -0,0 +1,28 @@
+import threading
+
+import pytest
+
+import agents
+import sqlite_db
+
+@pytest.fixture
+def scratch(tmp_path, monkeypatch):
+    # The shared storage lives under temp/ in the working directory.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sqlite_db, "_local", threading.local())
+    monkeypatch.setattr(agents.registry, "_instances", {})
+
+def test_teams_of_different_sessions_share_toolkits_and_storage(scratch):
+    first, second = agents.get_agent_team("a"), agents.get_agent_team("b")
+    assert first.storage is second.storage
+    first_tools = [tool for member in first.members for tool in member.tools or []]
+    second_tools = [tool for member in second.members for tool in member.tools or []]
+    assert first_tools and all(a is b for a, b in zip(first_tools, second_tools))
+
+def test_summary_agent_is_reused_within_a_thread():
+    assert agents.get_summary_agent("a") is agents.get_summary_agent("b")
+    other = []
+    thread = threading.Thread(target=lambda: other.append(agents.get_summary_agent("a")))
+    thread.start()
+    thread.join()
+    assert other[0] is not agents.get_summary_agent("a")
@@ -0,0 +1,39 @@
+import os
+import base64
+import hashlib
+
+import pytest
+
+import audio_stream
+from audio_stream import StreamingAudioWriter, decode_base64_to_writer
+
+def test_writer_moves_the_part_file_into_place_on_close(tmp_path):
+    path = str(tmp_path / "episode.mp3")
+    with StreamingAudioWriter(path) as writer:
+        writer.write(b"first")
+        assert not os.path.exists(path) and os.path.exists(writer.part_path)
+        writer.write(b"second")
+    with open(path, "rb") as f:
+        assert f.read() == b"firstsecond"
+    assert writer.bytes_written == 11
+    assert os.listdir(tmp_path) == ["episode.mp3"]
+
+def test_writer_leaves_nothing_behind_after_a_failure(tmp_path):
+    path = str(tmp_path / "episode.mp3")
+    with pytest.raises(RuntimeError):
+        with StreamingAudioWriter(path) as writer:
+            writer.write(b"first")
+            raise RuntimeError("synthesis failed")
+    assert os.listdir(tmp_path) == []
+
+def test_base64_is_decoded_slice_by_slice(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_stream, "BASE64_SLICE_CHARS", 8)
+    data = bytes(range(256)) * 3
+    writes = []
+    with StreamingAudioWriter(str(tmp_path / "episode.mp3")) as writer:
+        write = writer.write
+        writer.write = lambda chunk: (writes.append(len(chunk)), write(chunk))
+        decode_base64_to_writer(base64.b64encode(data).decode("ascii"), writer)
+    with open(tmp_path / "episode.mp3", "rb") as f:
+        assert f.read() == data
+    assert max(writes) == 6 and writer.sha256.digest() == hashlib.sha256(data).digest()
@@ -0,0 +1,48 @@
+import json
+
+import batch
+import rate_limits
+
+def test_load_items_groups_jsonl_prompts_by_id(tmp_path):
+    path = tmp_path / "prompts.jsonl"
+    path.write_text("\n".join(json.dumps(row) for row in [
+        {"id": "ai", "prompts": ["Suggest topics", "Write a script for topic 1"]},
+        {"id": "space", "prompts": "Suggest topics about space"},
+        {"prompt": "Suggest topics about food"},
+        {"id": "ai", "prompt": "Convert it to audio"},
+    ]))
+    assert batch.load_items(str(path)) == [
+        {"id": "ai", "prompts": ["Suggest topics", "Write a script for topic 1", "Convert it to audio"]},
+        {"id": "space", "prompts": ["Suggest topics about space"]},
+        {"id": "2", "prompts": ["Suggest topics about food"]},
+    ]
+
+def test_load_items_groups_csv_rows_by_id(tmp_path):
+    path = tmp_path / "prompts.csv"
+    path.write_text("id,prompt\nai,Suggest topics\nspace,Suggest topics about space\nai,Write a script for topic 1\n")
+    assert batch.load_items(str(path)) == [
+        {"id": "ai", "prompts": ["Suggest topics", "Write a script for topic 1"]},
+        {"id": "space", "prompts": ["Suggest topics about space"]},
+    ]
+
+def test_run_batch_resumes_from_the_checkpoint(tmp_path, monkeypatch):
+    path = tmp_path / "prompts.jsonl"
+    path.write_text("\n".join(json.dumps({"id": item_id, "prompt": "Suggest topics"}) for item_id in ["a", "b", "c"]))
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    (out_dir / "checkpoint.jsonl").write_text(json.dumps({"id": "a", "elapsed": 1.0}) + "\n")
+
+    ran = []
+    def run_item(item, out):
+        if item["id"] == "c":
+            raise RuntimeError("provider down")
+        ran.append(item["id"])
+        return {"id": item["id"], "elapsed": 0.0, "steps": []}
+    monkeypatch.setattr(batch, "run_item", run_item)
+    monkeypatch.setattr(rate_limits, "limiters", {})
+
+    summary = batch.run_batch(str(path), str(out_dir), concurrency=2, limiters={})
+    assert ran == ["b"]
+    assert summary["ran"] == 1 and summary["failed"] == ["c"] and summary["skipped"] == 1
+    # The failed item is not checkpointed, so the next run retries it.
+    assert set(batch.load_checkpoint(str(out_dir / "checkpoint.jsonl"))) == {"a", "b"}
@@ -0,0 +1,28 @@
+import os
+import sys
+import json
+import subprocess
+
+import bench
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+def test_report_has_percentiles_per_stage(monkeypatch):
+    monkeypatch.setattr(bench, "timings", {"turn.total": [0.1, 0.2, 0.3, 0.4], "empty": []})
+    stages = bench.report()
+    assert list(stages) == ["turn.total"]
+    assert stages["turn.total"]["count"] == 4 and round(stages["turn.total"]["p50_ms"]) == 250
+
+def test_benchmark_runs_offline_and_writes_its_report(tmp_path):
+    out_file = tmp_path / "bench.json"
+    subprocess.run(
+        [sys.executable, os.path.join(SRC, "bench.py"), "--turns", "5", "--reruns", "2", "--sessions", "5",
+         "--messages", "2", "--llm-latency", "0", "--tool-latency", "0", "--tts-latency", "0", "--out", str(out_file)],
+        cwd=tmp_path, capture_output=True, text=True, check=True, timeout=300,
+    )
+    results = json.loads(out_file.read_text())
+    # One pass over the prompts: four locally routed turns, one through the team, and the audio.
+    assert results["stages"]["turn.local_routed"]["count"] == 4
+    assert results["stages"]["turn.llm_routed"]["count"] == 1
+    assert "tts.chunk" in results["stages"] and "rerun.cached_team" in results["stages"]
+    assert len(results["storage_growth"]) == 5
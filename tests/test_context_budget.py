@@ -0,0 +1,43 @@
+import context_budget
+import router
+from context_budget import ContextPolicy, build_context, estimate_tokens
+
+TOPICS = "# Topic 1: Local LLMs\n- Description\n# Topic 2: AI agents\n- Description"
+
+def conversation(turns: int, size: int = 400):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i} " + "word " * size})
+        messages.append({"role": "assistant", "content": f"Answer {i} " + "word " * size})
+    return messages
+
+def test_context_stays_within_budget():
+    context, tokens = build_context(conversation(30), ContextPolicy(budget=1000, pin_topics=False))
+    assert tokens <= 1000
+    assert tokens == estimate_tokens(context)
+
+def test_recent_turns_are_verbatim_and_older_ones_summarized():
+    context, _ = build_context(conversation(30, size=50), ContextPolicy(budget=1000, pin_topics=False))
+    assert "Answer 29 " + "word " * 49 in context
+    assert "## Summary of earlier conversation" in context
+    assert "- user: Question" in context
+
+def test_latest_topics_are_pinned():
+    messages = [{"role": "assistant", "content": TOPICS}] + conversation(30)
+    context, _ = build_context(messages, ContextPolicy(budget=1000))
+    assert context.startswith("## Latest suggested topics\n" + TOPICS)
+
+def test_empty_history_gives_empty_context():
+    assert build_context([], ContextPolicy(budget=1000)) == ("", 0)
+
+def test_unknown_agents_use_the_team_policy():
+    messages = conversation(2, size=10)
+    assert context_budget.build_context_for("Someone else", messages) == build_context(messages, context_budget.POLICIES[context_budget.TEAM])
+
+def test_writer_sees_the_script_and_voice_agent_does_not():
+    script = "This is a sentence of the podcast script. " * 50
+    messages = [{"role": "assistant", "content": script}, {"role": "user", "content": "Make the script shorter"}]
+    writer_context, _ = context_budget.build_context_for(router.WRITER_AGENT, messages)
+    voice_context, _ = context_budget.build_context_for(router.VOICE_AGENT, messages)
+    assert "## Latest podcast script\n" + script in writer_context
+    assert script not in voice_context
@@ -0,0 +1,19 @@
+import os
+import sys
+import json
+import subprocess
+
+import profile_imports
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+def test_page_modules_do_not_import_the_model_and_tool_sdks(tmp_path):
+    # What main.py imports before the first prompt, together in a fresh interpreter.
+    check = (
+        f"import sys; sys.path.insert(0, {SRC!r}); "
+        + "".join(f"import {module}; " for module in profile_imports.DEFAULT_MODULES)
+        + f"import json; print(json.dumps([m for m in {profile_imports.DEFERRED_MODULES!r} if m in sys.modules]))"
+    )
+    process = subprocess.run([sys.executable, "-c", check], cwd=tmp_path, capture_output=True, text=True)
+    assert process.returncode == 0, process.stderr
+    assert json.loads(process.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+import jobs
+
+@pytest.fixture
+def jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "jobs_db_file", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(jobs, "_recovered", True)
+
+def wait_until_finished(job_id):
+    for _ in range(200):
+        if jobs.get_job(job_id)["status"] in (jobs.DONE, jobs.FAILED):
+            return
+        threading.Event().wait(0.01)
+
+def test_a_session_runs_one_job_at_a_time(jobs_db):
+    release = threading.Event()
+    first = jobs.submit("s", "first", lambda job: (release.wait(5), {"text": "done"})[1])
+    assert first is not None
+    assert jobs.submit("s", "second", lambda job: {}) is None
+    assert jobs.get_active_job("s")["job_id"] == first
+
+    other = jobs.submit("other", "prompt", lambda job: {})
+    assert other is not None
+
+    release.set()
+    wait_until_finished(first)
+    assert jobs.get_job(first)["result"] == {"text": "done"}
+    assert jobs.submit("s", "third", lambda job: {}) is not None
+
+def test_concurrent_submits_start_one_job(jobs_db):
+    release = threading.Event()
+    start = threading.Barrier(8)
+    accepted = []
+
+    def submit():
+        start.wait()
+        job_id = jobs.submit("busy", "prompt", lambda job: (release.wait(5), {})[1])
+        if job_id is not None:
+            accepted.append(job_id)
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    release.set()
+    assert len(accepted) == 1
+    wait_until_finished(accepted[0])
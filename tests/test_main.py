@@ -0,0 +1,79 @@
+import os
+import time
+import threading
+
+import pytest
+
+import agents
+import jobs
+import pipeline
+import session_store
+import sqlite_db
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "main.py")
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # The app keeps its stores under temp/ in the working directory.
+    testing = pytest.importorskip("streamlit.testing.v1")
+    import streamlit as st
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sqlite_db, "_local", threading.local())
+    st.cache_resource.clear()
+    return testing.AppTest.from_file(MAIN, default_timeout=30)
+
+@pytest.fixture
+def built_teams(monkeypatch):
+    # Stand-ins for the team and the turn, so prompts can be sent without models.
+    teams = []
+    def get_agent_team(session_id):
+        teams.append(session_id)
+        return object()
+    def complete_turn(team, prompt, session_id, history, on_text=None, on_audio=None):
+        session_store.append_message(session_id, {"role": "assistant", "content": f"Answer to {prompt}"})
+        return {"text": "", "audio_files": [], "elapsed": 0.0}
+    monkeypatch.setattr(agents, "get_agent_team", get_agent_team)
+    monkeypatch.setattr(pipeline, "complete_turn", complete_turn)
+    return teams
+
+def send(app, prompt):
+    app.chat_input[0].set_value(prompt).run()
+    session_id = app.session_state["current_session_id"]
+    for _ in range(500):
+        if jobs.get_active_job(session_id) is None:
+            break
+        time.sleep(0.01)
+    app.run()
+
+def test_new_chat_stays_selected_after_a_rerun(app):
+    app.run()
+    first_id = app.session_state["current_session_id"]
+    next(button for button in app.sidebar.button if "New Chat" in button.label).click().run()
+    new_id = app.session_state["current_session_id"]
+    assert new_id != first_id
+
+    # Both sessions are untitled; the selectbox must still tell them apart.
+    app.run()
+    assert app.session_state["current_session_id"] == new_id
+    assert app.sidebar.selectbox[0].value == new_id
+
+def test_the_team_is_built_once_per_session(app, built_teams):
+    app.run()
+    first_id = app.session_state["current_session_id"]
+    send(app, "Suggest 5 podcast topics")
+    send(app, "Write a script for topic 1")
+    assert built_teams == [first_id]
+    assert [m["content"] for m in app.session_state["messages"]][-1] == "Answer to Write a script for topic 1"
+
+    next(button for button in app.sidebar.button if "New Chat" in button.label).click().run()
+    send(app, "Suggest 5 podcast topics")
+    assert built_teams == [first_id, app.session_state["current_session_id"]]
+
+def test_a_refused_prompt_does_not_build_a_team(app, built_teams, monkeypatch):
+    # Another tab of the session started a job between this page's render and its submit.
+    app.run()
+    monkeypatch.setattr(jobs, "submit", lambda session_id, prompt, fn: None)
+    app.chat_input[0].set_value("Suggest 5 podcast topics").run()
+    assert "still being generated" in app.warning[0].value
+    assert built_teams == []
@@ -0,0 +1,132 @@
+import time
+import threading
+
+import pytest
+
+import model_pool
+from model_pool import ModelPool
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+def failing_pool(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(model_pool.time, "time", clock.time)
+    pool = ModelPool("writer", {"groq": object(), "gemini": object()})
+    for _ in range(3):
+        pool.record("groq", None, error=True)
+    return pool, clock
+
+def test_failing_provider_is_skipped_during_its_cooldown(monkeypatch):
+    pool, clock = failing_pool(monkeypatch)
+    assert pool.ranked() == ["gemini", "groq"]
+    clock.now += model_pool.COOLDOWN_SECONDS - 1
+    assert pool.ranked() == ["gemini", "groq"]
+
+def test_one_probe_after_the_cooldown_restores_a_recovered_provider(monkeypatch):
+    pool, clock = failing_pool(monkeypatch)
+    clock.now += model_pool.COOLDOWN_SECONDS
+    assert pool.ranked() == ["groq", "gemini"]
+
+    pool.start("groq")
+    # Only one call probes at a time
+    assert pool.ranked() == ["gemini", "groq"]
+
+    pool.record("groq", 0.5, error=False)
+    assert pool.stats["groq"].error_rate == 0.0
+    assert pool.ranked() == ["groq", "gemini"]
+
+def test_failed_probe_starts_another_cooldown(monkeypatch):
+    pool, clock = failing_pool(monkeypatch)
+    clock.now += model_pool.COOLDOWN_SECONDS
+    pool.start("groq")
+    pool.record("groq", None, error=True)
+    assert pool.ranked() == ["gemini", "groq"]
+    clock.now += model_pool.COOLDOWN_SECONDS
+    assert pool.ranked() == ["groq", "gemini"]
+
+def test_unmeasured_provider_is_explored_and_wins_when_faster(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(model_pool.time, "time", clock.time)
+    pool = ModelPool("writer", {"gemini": object(), "groq": object(), "ollama": object()})
+    for _ in range(5):
+        pool.record("gemini", 8.0, error=False)
+    assert pool.ranked() == ["gemini", "groq", "ollama"]
+
+    orders = [pool.ranked(explore=True) for _ in range(model_pool.EXPLORE_EVERY)]
+    assert [order[0] for order in orders].count("groq") == 1
+    assert orders[-1] == ["groq", "gemini", "ollama"]
+
+    pool.record("groq", 1.0, error=False)
+    assert pool.ranked() == ["groq", "gemini", "ollama"]
+
+def test_exploration_leaves_pinned_and_hedge_providers_alone(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(model_pool.time, "time", clock.time)
+    pinned = ModelPool("summary", {"ollama": object(), "gemini": object()}, pinned="ollama")
+    hedged = ModelPool("writer", {"gemini": object(), "ollama": object()}, hedge_with="ollama")
+    for pool, first in [(pinned, "ollama"), (hedged, "gemini")]:
+        pool.record(first, 8.0, error=False)
+        assert all(pool.ranked(explore=True)[0] == first for _ in range(2 * model_pool.EXPLORE_EVERY))
+
+def test_stale_measurements_are_refreshed(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(model_pool.time, "time", clock.time)
+    pool = ModelPool("writer", {"gemini": object(), "groq": object()})
+    pool.record("gemini", 1.0, error=False)
+    pool.record("groq", 2.0, error=False)
+    assert all(pool.ranked(explore=True)[0] == "gemini" for _ in range(model_pool.EXPLORE_EVERY))
+    clock.now += model_pool.STALE_SECONDS
+    pool.record("gemini", 1.0, error=False)
+    assert [pool.ranked(explore=True)[0] for _ in range(model_pool.EXPLORE_EVERY)].count("groq") == 1
+
+class StreamingModel:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.closed = threading.Event()
+
+    def invoke_stream(self, messages, **kwargs):
+        time.sleep(self.delay)
+        try:
+            yield "first"
+            yield "second"
+        finally:
+            self.closed.set()
+
+def test_losing_hedged_stream_is_closed(monkeypatch):
+    monkeypatch.setattr(model_pool.rate_limits, "acquire", lambda name: None)
+    slow, fast = StreamingModel(0.3), StreamingModel(0.0)
+    pool = ModelPool("writer", {"gemini": slow, "ollama": fast}, hedge_with="ollama", hedge_after=0.05)
+    chunks = list(model_pool.PooledModel(pool=pool).invoke_stream([]))
+    assert chunks == [("ollama", "first"), ("ollama", "second")]
+    assert slow.closed.wait(timeout=2)
+    assert pool.stats["gemini"].first_chunk_latencies and pool.stats["ollama"].first_chunk_latencies
+    assert not pool.stats["gemini"].latencies
+
+def test_streams_are_ranked_by_first_chunk_time_and_calls_by_call_time():
+    pool = ModelPool("writer", {"gemini": object(), "groq": object()})
+    pool.record("gemini", 5.0, error=False)
+    pool.record("groq", 8.0, error=False)
+    pool.record("gemini", 2.0, error=False, stream=True)
+    pool.record("groq", 0.5, error=False, stream=True)
+    assert pool.ranked() == ["gemini", "groq"]
+    assert pool.ranked(stream=True) == ["groq", "gemini"]
+
+class FailingModel:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def invoke(self, messages, **kwargs):
+        time.sleep(self.delay)
+        raise ConnectionError("provider is down")
+
+def test_the_provider_error_is_kept_when_every_provider_was_raced(monkeypatch):
+    monkeypatch.setattr(model_pool.rate_limits, "acquire", lambda name: None)
+    pool = ModelPool("writer", {"gemini": FailingModel(0.2), "ollama": FailingModel()}, hedge_with="ollama", hedge_after=0.05)
+    with pytest.raises(RuntimeError) as raised:
+        model_pool.PooledModel(pool=pool).invoke([])
+    assert isinstance(raised.value.__cause__, ConnectionError)
@@ -0,0 +1,47 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from pipeline import is_content_chunk, run_turn, strip_think_sections, strip_think_stream
+
+def test_strip_think_sections():
+    assert strip_think_sections("<think>plan</think>Answer<think>more</think>!") == "Answer!"
+
+def test_strip_think_stream_hides_unfinished_blocks():
+    assert strip_think_stream("Answer <think>still thinking") == "Answer "
+    assert strip_think_stream("Answer <thi") == "Answer "
+    assert strip_think_stream("<think>done</think>Answer") == "Answer"
+    assert strip_think_stream("3 < 4") == "3 < 4"
+
+def test_only_the_runners_own_content_events_count():
+    member = SimpleNamespace(event="RunResponseContent", content="text")
+    team = SimpleNamespace(event="TeamRunResponseContent", content="text")
+    tool = SimpleNamespace(event="ToolCallStarted", content=None)
+    assert is_content_chunk(member) and not is_content_chunk(team)
+    assert is_content_chunk(team, team_run=True) and not is_content_chunk(member, team_run=True)
+    assert not is_content_chunk(tool) and not is_content_chunk(tool, team_run=True)
+
+@pytest.fixture(scope="module")
+def bench_team(tmp_path_factory):
+    # The stores use paths under temp/, so the module runs in a scratch directory. The stand-ins and
+    # registry entries are undone afterwards, so later test modules see the real classes and settings.
+    import agents
+    import bench
+    import session_store
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("pipeline"))
+        os.makedirs("temp", exist_ok=True)
+        mp.setattr(agents.registry, "_instances", dict(agents.registry._instances))
+        bench.install_stand_ins(0.0, 0.0, 0.0, patch=mp.setattr)
+        session_store.create_session("team-session")
+        yield agents.get_agent_team("team-session")
+
+def test_team_routed_turn_records_the_routing_hop(bench_team):
+    import tracing
+
+    result = run_turn(bench_team, "What do you think works best?", "team-session", [])
+    assert result.routed_by == "llm"
+    spans = [span["name"] for span in tracing.load_traces("team-session", limit=1)[0]["spans"]]
+    assert "route.llm" in spans
@@ -0,0 +1,23 @@
+import rate_limits
+from rate_limits import RateLimiter
+
+def test_every_call_takes_a_token_from_its_provider(monkeypatch):
+    limiter = RateLimiter(2, 60)
+    monkeypatch.setattr(rate_limits, "limiters", {})
+    rate_limits.configure({"gemini": limiter})
+    rate_limits.acquire("gemini")
+    rate_limits.acquire("groq")
+    assert len(limiter._times) == 1
+
+def test_limiter_waits_for_the_window(monkeypatch):
+    clock = [0.0]
+    sleeps = []
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+    monkeypatch.setattr(rate_limits.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(rate_limits.time, "sleep", sleep)
+    limiter = RateLimiter(2, 10)
+    for _ in range(3):
+        limiter.acquire()
+    assert sleeps == [10]
@@ -0,0 +1,105 @@
+import json
+import time
+import threading
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import research
+
+DELAY = 0.3
+# Article 1 fails and article 2 misses the deadline.
+FAILING, SLOW = "/article/1", "/article/2"
+
+class StandIn(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(DELAY)
+        if self.path == FAILING:
+            self.send_error(500)
+            return
+        if self.path == SLOW:
+            time.sleep(5)
+        if self.path.startswith("/search"):
+            body = [{"title": f"Result {i}", "url": f"{self.server.base}/article/{i}", "description": ""} for i in range(4)]
+        elif self.path.startswith("/papers"):
+            body = [{"title": "Paper", "url": f"{self.server.base}/paper", "summary": "Abstract."}]
+        else:
+            body = {"url": self.server.base + self.path, "title": self.path, "text": "Article text."}
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    httpd.daemon_threads = True
+    httpd.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+
+def get(url: str):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return json.loads(response.read())
+
+def test_prefetch_runs_fetches_concurrently_and_drops_failures(server):
+    start = time.perf_counter()
+    results = research.prefetch(
+        "ai trends", max_articles=4, max_papers=1, timeout=1.5,
+        search_fn=lambda query, n: get(f"{server.base}/search?q={urllib.parse.quote(query)}")[:n],
+        article_fn=get,
+        papers_fn=lambda query, n: get(f"{server.base}/papers?q={urllib.parse.quote(query)}")[:n],
+    )
+    elapsed = time.perf_counter() - start
+
+    # Search and papers in parallel, then four articles in parallel: two rounds of DELAY, not six,
+    # plus the wait for the slow article up to the deadline.
+    assert elapsed < 1.5 + 2 * DELAY
+    assert [article["title"] for article in results.articles] == ["/article/0", "/article/3"]
+    assert [paper["title"] for paper in results.papers] == ["Paper"]
+    assert len(results.errors) == 2
+    assert any(FAILING in error and "HTTPError" in error for error in results.errors)
+    assert any(SLOW in error and "TimeoutError" in error for error in results.errors)
+
+def test_articles_download_while_the_paper_search_is_running():
+    start = time.perf_counter()
+    results = research.prefetch(
+        "ai trends", max_articles=2, max_papers=1, timeout=5,
+        search_fn=lambda query, n: [{"title": "Result", "url": f"http://localhost/{i}"} for i in range(n)],
+        article_fn=lambda url: (time.sleep(DELAY), {"url": url, "title": url, "text": "Text."})[1],
+        papers_fn=lambda query, n: (time.sleep(2 * DELAY), [])[1],
+    )
+    elapsed = time.perf_counter() - start
+    assert len(results.articles) == 2 and not results.errors
+    # One after the other this would take 4 * DELAY.
+    assert elapsed < 3 * DELAY
+
+def test_slow_search_leaves_less_time_for_the_articles():
+    start = time.perf_counter()
+    research.prefetch(
+        "ai trends", max_articles=1, max_papers=1, timeout=1.0,
+        search_fn=lambda query, n: (time.sleep(2 * DELAY), [{"title": "Result", "url": "http://localhost/0"}])[1],
+        article_fn=lambda url: (time.sleep(5), {})[1],
+        papers_fn=lambda query, n: [],
+    )
+    # Separate timeouts for the search and the articles would take 2 * DELAY + 1.0.
+    assert time.perf_counter() - start < 1.0 + DELAY / 2
+
+TOPICS = "# Topic 1: Local LLMs\n# Topic 2: Quantum networking\n# Topic 3: Space tourism"
+
+def test_research_query_only_for_new_scripts_with_a_resolved_topic():
+    assert research.research_query("Write a podcast script for the 3rd topic", TOPICS) == "Space tourism"
+    assert research.research_query("Write a podcast script about quantum computing.") == "quantum computing"
+    assert research.research_query("Write a podcast script for topic 2") is None
+    assert research.research_query("Make the script shorter", TOPICS) is None
+    assert research.research_query("Rewrite the script in a funnier tone", TOPICS) is None
+    assert research.research_query("Write a script") is None
@@ -0,0 +1,39 @@
+import pytest
+
+import response_cache
+import router
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    pytest.importorskip("lancedb")
+    monkeypatch.setattr(response_cache, "cache_dir", str(tmp_path / "response_cache.lancedb"))
+    monkeypatch.setattr(response_cache, "embedder", response_cache.HashEmbedder())
+    monkeypatch.setattr(response_cache, "ENABLED", True)
+    monkeypatch.setattr(response_cache, "_tables", {})
+    return response_cache
+
+def test_rephrased_prompt_is_answered_from_the_cache(cache):
+    cache.store(router.TOPIC_AGENT, "Suggest 5 podcast topics about tech trends", "1. Local LLMs")
+    hit = cache.lookup(router.TOPIC_AGENT, "Suggest 5 podcast topics on the tech trends")
+    assert hit is not None and hit["response"] == "1. Local LLMs"
+
+def test_narrower_prompt_is_not_answered_with_the_broader_answer(cache):
+    cache.store(router.TOPIC_AGENT, "Suggest 5 podcast topics about tech trends", "1. Local LLMs")
+    assert cache.lookup(router.TOPIC_AGENT, "Suggest 5 podcast topics about tech trends in healthcare") is None
+    assert cache.lookup(router.TOPIC_AGENT, "Suggest 10 podcast topics about tech trends") is None
+
+def test_stub_embedder_is_only_used_when_asked_for(monkeypatch):
+    monkeypatch.setenv("PODCAST_EMBEDDER", "stub")
+    assert isinstance(response_cache.get_default_embedder(), response_cache.HashEmbedder)
+
+class UnreachableOllama:
+    def embed(self, **kwargs):
+        raise ConnectionError("ollama is not running")
+
+def test_unreachable_embedding_model_skips_the_cache(cache, monkeypatch):
+    pytest.importorskip("agno")
+    embedder = response_cache.OllamaEmbedder()
+    embedder.embedder.ollama_client = UnreachableOllama()
+    monkeypatch.setattr(response_cache, "embedder", embedder)
+    cache.store(router.TOPIC_AGENT, "Suggest 5 podcast topics about tech trends", "1. Local LLMs")
+    assert cache.lookup(router.TOPIC_AGENT, "Suggest 5 podcast topics about tech trends") is None
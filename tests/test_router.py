@@ -0,0 +1,45 @@
+import router
+
+SCRIPT = "## Chapter 1\n" + "This is a sentence of the podcast script. " * 50
+TOPICS = "# Topic 1: Local LLMs\n- Description\n# Topic 2: AI agents\n- Description"
+
+def test_clear_requests_are_routed_locally():
+    assert router.route("Suggest 5 podcast topics about tech trends.").member == router.TOPIC_AGENT
+    assert router.route("Write a podcast script for the 3rd topic you mentioned.").member == router.WRITER_AGENT
+    assert router.route("Write an instagram caption for this episode.").member == router.CAPTION_AGENT
+    assert router.route("Convert the script to audio.").member == router.VOICE_AGENT
+
+def test_ambiguous_requests_go_to_the_team():
+    assert router.route("What do you think works best?").member is None
+
+def test_numbered_topic_references_are_detected():
+    assert router.route("Write a script for the 3rd topic").references_topic
+    assert not router.route("Write a script about AI").references_topic
+
+def test_find_latest_script_and_topics():
+    messages = [
+        {"role": "assistant", "content": TOPICS},
+        {"role": "assistant", "content": SCRIPT},
+        {"role": "assistant", "content": ["temp/artifacts/ab/ab.mp3"]},
+        {"role": "assistant", "content": "Short caption"},
+    ]
+    assert router.find_latest_script(messages) == SCRIPT
+    assert router.find_latest_topics(messages) == TOPICS
+
+def test_member_message_needs_its_context():
+    voice = router.route("Convert the script to audio.")
+    assert router.build_member_message(voice, "Convert the script to audio.", []) is None
+    assert router.build_member_message(voice, "Convert the script to audio.", [{"role": "assistant", "content": SCRIPT}]) is not None
+
+    writer = router.route("Write a script for the 2nd topic")
+    assert router.build_member_message(writer, "Write a script for the 2nd topic", []) is None
+    message = router.build_member_message(writer, "Write a script for the 2nd topic", [{"role": "assistant", "content": TOPICS}])
+    assert TOPICS in message
+
+def test_audio_rules_need_the_script_as_object():
+    for prompt in ["Turn it into audio", "Convert the script to speech", "Make this into an mp3",
+                   "Convert this podcast script to audio", "Make it into a podcast audio file",
+                   "Generate the audio", "Create a voiceover"]:
+        assert router.route(prompt).member == router.VOICE_AGENT, prompt
+    assert router.route("Make a podcast about voice assistants").member != router.VOICE_AGENT
+    assert router.route("Create a podcast about audio engineering").member != router.VOICE_AGENT
@@ -0,0 +1,62 @@
+import json
+import time
+import os
+
+import session_store
+
+def write_legacy(path, sessions):
+    with open(path, "w") as f:
+        json.dump({"sessions": sessions}, f)
+
+def test_migrate_from_json_imports_sessions_once(tmp_path):
+    json_file = str(tmp_path / "conversations.json")
+    db_file = str(tmp_path / "sessions.db")
+    write_legacy(json_file, [
+        {"session_id": "newest", "summary": "AI trends", "messages": [
+            {"role": "user", "content": "Suggest topics"},
+            {"role": "assistant", "content": "Topic 1"},
+            {"role": "assistant", "content": ["temp/generated_audio.mp3"]},
+        ]},
+        {"session_id": "oldest", "messages": []},
+    ])
+
+    assert session_store.migrate_from_json(json_file, db_file) == 2
+    assert not os.path.exists(json_file)
+    assert os.path.exists(json_file + ".migrated")
+
+    # The JSON file listed the newest session first
+    assert [s["session_id"] for s in session_store.list_sessions(db_file=db_file)] == ["newest", "oldest"]
+    assert session_store.get_session("oldest", db_file=db_file)["summary"] == session_store.DEFAULT_SUMMARY
+    assert session_store.load_messages("newest", db_file=db_file)[2] == {"role": "assistant", "content": ["temp/generated_audio.mp3"]}
+
+    # A file showing up again under the same name is not imported twice
+    write_legacy(json_file, [{"session_id": "again", "messages": []}])
+    assert session_store.migrate_from_json(json_file, db_file) == 0
+    assert session_store.count_sessions(db_file=db_file) == 2
+
+def test_append_message_moves_session_to_the_top(tmp_path):
+    db_file = str(tmp_path / "sessions.db")
+    session_store.create_session("a", db_file=db_file)
+    session_store.create_session("b", db_file=db_file)
+    session_store.append_message("a", {"role": "user", "content": "hi"}, db_file=db_file)
+    assert session_store.list_sessions(limit=1, db_file=db_file)[0]["session_id"] == "a"
+
+def test_delete_sessions_before_returns_and_removes_idle_sessions(tmp_path):
+    db_file = str(tmp_path / "sessions.db")
+    session_store.create_session("old", db_file=db_file)
+    session_store.append_message("old", {"role": "user", "content": "hi"}, db_file=db_file)
+    cutoff = time.time()
+    session_store.create_session("new", db_file=db_file)
+
+    removed = session_store.delete_sessions_before(cutoff, db_file=db_file)
+    assert [s["session_id"] for s in removed] == ["old"]
+    assert removed[0]["messages"] == [{"role": "user", "content": "hi"}]
+    assert [s["session_id"] for s in session_store.list_sessions(db_file=db_file)] == ["new"]
+    assert session_store.load_messages("old", db_file=db_file) == []
+
+def test_set_summary_only_if_keeps_a_title_written_in_the_meantime(tmp_path):
+    db_file = str(tmp_path / "sessions.db")
+    session_store.create_session("a", db_file=db_file)
+    assert session_store.set_summary("a", "User title", db_file=db_file)
+    assert not session_store.set_summary("a", "Model title", only_if=session_store.DEFAULT_SUMMARY, db_file=db_file)
+    assert session_store.get_session("a", db_file=db_file)["summary"] == "User title"
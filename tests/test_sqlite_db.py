@@ -0,0 +1,15 @@
+import threading
+
+import sqlite_db
+
+def test_connections_are_per_thread_and_use_wal(tmp_path):
+    db_file = str(tmp_path / "store.db")
+    conn = sqlite_db.get_connection(db_file, "CREATE TABLE IF NOT EXISTS t (x INTEGER);")
+    assert sqlite_db.get_connection(db_file) is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(sqlite_db.get_connection(db_file)))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
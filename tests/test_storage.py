@@ -0,0 +1,29 @@
+import os
+
+import artifact_cache
+import session_store
+import storage
+
+def test_pruned_app_sessions_release_their_audio(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_cache, "cache_dir", str(tmp_path / "artifacts"))
+    monkeypatch.setattr(storage, "archive_dir", str(tmp_path / "archive"))
+    db_file = str(tmp_path / "sessions.db")
+    session_store.create_session("old", db_file=db_file)
+    path = artifact_cache.put(artifact_cache.make_key("episode"), b"mp3 bytes")
+    artifact_cache.reference_path(path, "old")
+
+    monkeypatch.setattr(artifact_cache, "MAX_CACHE_BYTES", 0)
+    assert artifact_cache.evict() == []
+    assert storage.prune_app_sessions(0, archive=True, db_file=db_file) == 1
+    assert session_store.get_session("old", db_file=db_file) is None
+    assert not os.path.exists(path)
+    assert os.listdir(storage.archive_dir)
+
+def test_storage_adds_only_the_time_indexes(tmp_path):
+    from sqlalchemy import inspect
+
+    db_file = str(tmp_path / "shared_storage.db")
+    storage.create_storage("sessions", db_file)
+    indexes = {index["name"] for index in inspect(storage.get_engine(db_file)).get_indexes("sessions")}
+    assert {"idx_sessions_created_at", "idx_sessions_updated_at"} <= indexes
+    assert "idx_sessions_session_id" not in indexes
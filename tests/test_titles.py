@@ -0,0 +1,79 @@
+import os
+import sys
+import threading
+import subprocess
+
+import pytest
+
+import session_store
+import sqlite_db
+import titles
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # The session store lives under temp/ in the working directory; fresh per-thread connections make
+    # the title workers open it there too.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sqlite_db, "_local", threading.local())
+    return tmp_path
+
+def wait_for_title(session_id):
+    for _ in range(500):
+        if not titles.is_pending(session_id):
+            return
+        threading.Event().wait(0.01)
+
+def test_heuristic_title_is_the_first_line_without_markdown():
+    assert titles.heuristic_title("<think>hmm</think>\n## Topic 1: **Local LLMs** are here to stay") == "Local LLMs are here to"
+    assert titles.heuristic_title("1. The rise of quantum networking.") == "The rise of quantum networking"
+    assert titles.heuristic_title("---\n\n") == session_store.DEFAULT_SUMMARY
+
+def test_schedule_titles_an_untitled_session_once(store, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(titles, "model_title", lambda text, session_id: (release.wait(5), "Local LLMs")[1])
+    session_store.create_session("a")
+    assert titles.schedule("a", "Topic 1: Local LLMs")
+    assert titles.is_pending("a")
+    assert not titles.schedule("a", "Topic 1: Local LLMs")
+
+    release.set()
+    wait_for_title("a")
+    assert session_store.get_session("a")["summary"] == "Local LLMs"
+    assert not titles.schedule("a", "Something else")
+
+def test_title_written_while_the_model_runs_is_kept(store, monkeypatch):
+    def model_title(text, session_id):
+        session_store.set_summary(session_id, "User title")
+        return "Model title"
+    monkeypatch.setattr(titles, "model_title", model_title)
+    session_store.create_session("a")
+    assert titles.schedule("a", "Topic 1: Local LLMs")
+    wait_for_title("a")
+    assert session_store.get_session("a")["summary"] == "User title"
+
+def test_backfill_skips_sessions_titled_in_the_meantime(store, monkeypatch):
+    def model_title(text, session_id):
+        if session_id == "b":
+            session_store.set_summary("b", "User title")
+        return f"Title for {session_id}"
+    monkeypatch.setattr(titles, "model_title", model_title)
+    for session_id in ["a", "b"]:
+        session_store.create_session(session_id)
+        session_store.append_message(session_id, {"role": "assistant", "content": f"Answer for {session_id}"})
+    session_store.create_session("empty")
+
+    assert titles.backfill() == {"a": "Title for a"}
+    assert session_store.get_session("b")["summary"] == "User title"
+    assert session_store.get_session("empty")["summary"] == session_store.DEFAULT_SUMMARY
+
+def test_backfill_cli_titles_old_sessions_without_a_model(store):
+    session_store.create_session("old")
+    session_store.append_message("old", {"role": "user", "content": "Suggest topics"})
+    session_store.append_message("old", {"role": "assistant", "content": "# Topic 1: Space tourism"})
+
+    output = subprocess.run([sys.executable, os.path.join(SRC, "titles.py"), "--heuristic"],
+                            cwd=store, capture_output=True, text=True, check=True).stdout
+    assert output == "old\tSpace tourism\n"
+    assert session_store.get_session("old")["summary"] == "Space tourism"
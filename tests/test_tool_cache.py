@@ -0,0 +1,45 @@
+import tool_cache
+
+def test_cached_results_are_reused_and_expired_ones_purged_on_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(tool_cache, "cache_db_file", str(tmp_path / "tool_cache.db"))
+    monkeypatch.setattr(tool_cache, "_last_purge", 0.0)
+    calls = []
+
+    @tool_cache.cached("search_web", ttl=60)
+    def search_web(query):
+        calls.append(query)
+        return f"results for {query}"
+
+    assert search_web(query="AI  Trends") == search_web(query="ai trends")
+    assert calls == ["AI  Trends"]
+
+    tool_cache.put("stale", "search_web", "old", ttl=-1)
+    count = lambda: tool_cache._connection().execute("SELECT COUNT(*) FROM tool_cache").fetchone()[0]
+    # Purged at most once per interval
+    assert count() == 2
+    monkeypatch.setattr(tool_cache, "_last_purge", 0.0)
+    tool_cache.put("fresh", "search_web", "new", ttl=60)
+    assert count() == 2
+
+def test_errors_and_empty_results_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(tool_cache, "cache_db_file", str(tmp_path / "tool_cache.db"))
+    results = iter(["Error reading article from http://a: timed out", "[]", '{"text": "Article"}'])
+    calls = []
+
+    @tool_cache.cached("read_article", ttl=60)
+    def read_article(url):
+        calls.append(url)
+        return next(results)
+
+    assert read_article(url="http://a").startswith("Error")
+    assert read_article(url="http://a") == "[]"
+    assert read_article(url="http://a") == '{"text": "Article"}'
+    assert read_article(url="http://a") == '{"text": "Article"}'
+    assert len(calls) == 3
+
+def test_is_valid_result():
+    assert tool_cache.is_valid_result('[{"title": "AI"}]')
+    assert tool_cache.is_valid_result("Plain article text")
+    assert tool_cache.is_valid_result([{"title": "AI"}])
+    for value in ["", "[]", "{}", "  error: rate limited", None, []]:
+        assert not tool_cache.is_valid_result(value)
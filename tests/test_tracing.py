@@ -0,0 +1,28 @@
+import json
+
+import tracing
+
+def write_traces(path, count, session_ids=("a", "b")):
+    with open(path, "w") as f:
+        for i in range(count):
+            entry = {"name": "turn", "attributes": {"session_id": session_ids[i % len(session_ids)], "turn": i}, "spans": []}
+            f.write(json.dumps(entry) + "\n")
+
+def test_load_traces_reads_the_latest_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "READ_BLOCK_BYTES", 50)
+    path = str(tmp_path / "traces.jsonl")
+    write_traces(path, 100)
+    assert [t["attributes"]["turn"] for t in tracing.load_traces(limit=3, path=path)] == [99, 98, 97]
+    assert [t["attributes"]["turn"] for t in tracing.load_traces("a", limit=2, path=path)] == [98, 96]
+    assert len(tracing.load_traces(limit=1000, path=path)) == 100
+
+def test_export_rotates_the_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "MAX_FILE_BYTES", 2000)
+    path = str(tmp_path / "traces.jsonl")
+    for i in range(50):
+        with tracing.trace("turn", export=False, session_id="a", turn=i) as current:
+            pass
+        tracing.export_jsonl(current, path)
+    assert (tmp_path / "traces.jsonl").stat().st_size <= 2000
+    assert (tmp_path / "traces.jsonl.1").exists()
+    assert tracing.load_traces(limit=1, path=path)[0]["attributes"]["turn"] == 49
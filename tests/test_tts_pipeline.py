@@ -0,0 +1,114 @@
+import time
+import threading
+
+import artifact_cache
+from tts_pipeline import StubTTSBackend, clean_script, split_script, synthesize_script_to_file
+
+def test_clean_script_drops_headings_cues_and_table_of_contents():
+    script = "\n".join([
+        "# Episode 1: The Future of AI",
+        "## Table of Contents",
+        "1. Intro",
+        "2. Deep dive",
+        "## Intro",
+        "🎧 \"upbeat intro music\"",
+        "**Host:** Welcome to the show. [music fades]",
+        "(sfx: applause) Today we talk about *AI*.",
+        "---",
+        "- Models are getting smaller.",
+    ])
+    assert clean_script(script) == "Welcome to the show. Today we talk about AI. Models are getting smaller."
+
+def test_clean_script_stops_skipping_the_table_of_contents_at_bold_titles():
+    script = "\n".join([
+        "## Table of Contents",
+        "",
+        "1. Hook",
+        "2. Chapter 1",
+        "**Hook**",
+        "Welcome to the show.",
+        "## Summary of Chapters",
+        "We cover AI today.",
+    ])
+    assert clean_script(script) == "Hook Welcome to the show.\n\nWe cover AI today."
+
+def test_clean_script_keeps_link_text_without_urls():
+    assert clean_script("Read about [AI](https://example.com) here ![logo](logo.png)") == "Read about AI here"
+
+def test_clean_script_keeps_paragraphs_apart():
+    assert clean_script("First paragraph.\n\nSecond paragraph.") == "First paragraph.\n\nSecond paragraph."
+
+def test_clean_script_of_only_headings_is_empty():
+    assert clean_script("# Title\n## Chapters\n- one\n- two") == ""
+
+def test_split_script_packs_paragraphs_in_order():
+    text = "\n\n".join(f"Paragraph {i}." for i in range(10))
+    chunks = split_script(text, max_chars=40)
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert " ".join(chunks) == " ".join(f"Paragraph {i}." for i in range(10))
+
+def test_split_script_splits_long_paragraphs_between_sentences():
+    paragraph = " ".join(f"Sentence number {i} is here." for i in range(20))
+    chunks = split_script(paragraph, max_chars=100)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 and chunk.endswith(".") for chunk in chunks)
+    assert " ".join(chunks) == paragraph
+
+def test_split_script_cuts_sentences_longer_than_the_limit():
+    sentence = ", ".join(f"clause number {i}" for i in range(200)) + "."
+    chunks = split_script(sentence, max_chars=100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert " ".join(chunks) == sentence
+    assert all(len(chunk) <= 100 for chunk in split_script("x" * 250, max_chars=100))
+
+class SlowFirstBackend(StubTTSBackend):
+    # Earlier chunks take longer, so they finish after later ones; returns the text to check the order.
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def synthesize(self, text: str) -> bytes:
+        with self.lock:
+            self.calls.append(text)
+            delay = 0.05 if len(self.calls) <= 2 else 0.0
+        time.sleep(delay)
+        return text.encode("utf-8") + b"|"
+
+def test_stub_backend_chunks_are_written_in_order_and_repeats_come_from_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_cache, "cache_dir", str(tmp_path / "artifacts"))
+    script = "\n\n".join(f"Paragraph {i} of the episode." for i in range(12))
+    chunks = split_script(clean_script(script), max_chars=60)
+    backend = SlowFirstBackend()
+
+    path = synthesize_script_to_file(script, backend=backend, max_workers=4, max_chars=60)
+    with open(path, "rb") as f:
+        assert f.read() == b"".join(chunk.encode("utf-8") + b"|" for chunk in chunks)
+    assert sorted(backend.calls) == sorted(chunks)
+
+    assert synthesize_script_to_file(script, backend=backend, max_workers=4, max_chars=60) == path
+    assert len(backend.calls) == len(chunks)
+
+def test_stub_backend_returns_mp3_frames():
+    audio = StubTTSBackend().synthesize("three short words")
+    assert audio == StubTTSBackend.SILENT_FRAME * 3
+
+def test_new_episode_and_pinned_first_segment_survive_a_full_cache(tmp_path, monkeypatch):
+    import os
+    import audio_stream
+
+    monkeypatch.setattr(artifact_cache, "cache_dir", str(tmp_path / "artifacts"))
+    monkeypatch.setattr(artifact_cache, "MAX_CACHE_BYTES", 1)
+    segments = []
+
+    def pin(path):
+        artifact_cache.reference_path(path, "turn:a")
+        segments.append(path)
+
+    token = audio_stream.segment_listener.set(pin)
+    try:
+        script = "\n\n".join(f"Paragraph {i} of the episode." for i in range(12))
+        path = synthesize_script_to_file(script, backend=StubTTSBackend(), max_workers=4, max_chars=60)
+    finally:
+        audio_stream.segment_listener.reset(token)
+    assert os.path.exists(path) and os.path.exists(segments[0])